@@ -8,17 +8,22 @@ sys.path.append(root_dir)
 import time
 from ttkbootstrap import Window
 
-from config.settings_loader import load_settings
+from config.settings_loader import load_settings, load_redirect_targets
 from ui.window_manager import WindowManager
 from network.udp_listener import UDPListener
 from helpers.packets.packet_handler import PacketHandler
+from network.ingest_thread import OVERWRITE_OLDEST
+
+UI_REFRESH_MS = 16  # Delay between two drains of the ring buffer by the UI thread
+RING_BUFFER_CAPACITY = 1024
 
 
 class TelemetryApp:
     """
     Main application class for the telemetry system.
     Initializes the main window, network listener, and packet handler.
-    Handles the main loop for receiving packets and updating the UI.
+    Packets are received on a dedicated network thread into a ring buffer,
+    which the Tk main loop drains periodically with ``after`` callbacks.
 
     Attributes:
 
@@ -27,6 +32,8 @@ class TelemetryApp:
         window_manager (WindowManager): Manages the UI components and updates.
         packet_handler (PacketHandler): Handles incoming packets and processes them.
         listener (UDPListener): Listens for incoming UDP packets.
+        ring_buffer (RingBuffer): Packets received by the network thread, waiting for the UI thread.
+        reported_overruns (int): Ring buffer overruns already reported.
         running (bool): Flag to control the main loop execution.
         last_update (float): Timestamp of the last UI update.
         packet_received (list): List to count received packets by type.
@@ -43,8 +50,13 @@ class TelemetryApp:
             redirect=self.settings["redirect_active"],
             ip_address=self.settings["ip_adress"],
             redirect_port=self.settings["redirect_port"],
+            packet_ids=set(self.packet_handler.function_hashmap),  # Packets without a handler are never decoded
+            redirect_targets=load_redirect_targets(self.settings),
+            redirect_queue_size=self.settings.get("redirect_queue_size", 256),
         )
 
+        self.ring_buffer = None
+        self.reported_overruns = 0
         self.running = True
         self.last_update = time.time()
         self.packet_received = [0] * 15
@@ -53,22 +65,30 @@ class TelemetryApp:
         self.main_window.protocol("WM_DELETE_WINDOW", self.close_window)
 
     def run(self):
-        """Main loop handling packet reception and UI updates."""
-        while self.running:
-            packet_data = self.listener.receive()
-            if packet_data:
-                header, packet = packet_data
-                self.packet_received[header.m_packetId] += 1
-                self.packet_handler.process_packet(header.m_packetId, packet)
-
-            if time.time() > self.last_update + 1:
-                self.last_update = time.time()
-                self.window_manager.update_packet_reception(self.packet_received)
-                self.packet_received = [0] * 15
-
-            self.window_manager.refresh_ui()
-
+        """Starts the network thread and the Tk main loop draining its packets."""
+        self.ring_buffer = self.listener.start_thread(RING_BUFFER_CAPACITY, OVERWRITE_OLDEST)
+        self.main_window.after(UI_REFRESH_MS, self.process_packets)
+        self.main_window.mainloop()
         self.shutdown()
+
+    def process_packets(self):
+        """Processes the packets buffered since the last call and reschedules itself on the Tk main loop."""
+        if not self.running:
+            return
+        # Rescheduled first, so an exception in a packet handler does not stop the UI updates
+        self.main_window.after(UI_REFRESH_MS, self.process_packets)
+
+        for header, packet in self.ring_buffer.drain():
+            self.packet_received[header.m_packetId] += 1
+            self.packet_handler.process_packet(header.m_packetId, packet)
+
+        if time.time() > self.last_update + 1:
+            self.last_update = time.time()
+            self.window_manager.update_packet_reception(self.packet_received)
+            self.packet_received = [0] * 15
+            if self.ring_buffer.overruns != self.reported_overruns:
+                print(f"Ring buffer overrun: {self.ring_buffer.overruns - self.reported_overruns} packets lost")
+                self.reported_overruns = self.ring_buffer.overruns
     
     def close_window(self):
         """Handles window closing event."""
@@ -5,4 +5,20 @@ SETTINGS_FILE = "config/settings.txt"
 def load_settings():
     """Loads settings from the configuration file."""
     with open(SETTINGS_FILE, "r") as file:
-        return json.load(file)
\ No newline at end of file
+        return json.load(file)
+
+def load_redirect_targets(settings):
+    """
+    Returns the (address, port) destinations of the UDP redirect.
+    They are read from the optional "redirect_targets" list, e.g.
+    "redirect_targets": [{"address": "127.0.0.1", "port": 20776}, {"address": "192.168.1.20", "port": 20777}].
+    When that list is present it overrides ip_adress and redirect_port (the keys edited by the UDP_Redirect dialog),
+    which are only used when it is absent. It is not in the default settings file, to redirect to several destinations
+    add it by hand.
+
+    :param dict settings: The settings loaded from the configuration file.
+    """
+    targets = settings.get("redirect_targets")
+    if not targets:
+        return [(settings["ip_adress"], int(settings["redirect_port"]))]
+    return [(target["address"], int(target["port"])) for target in targets]
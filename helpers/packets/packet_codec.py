@@ -0,0 +1,353 @@
+import collections
+import ctypes
+import struct
+
+from helpers.packets.packet_parser import PacketHeader, packet_header_to_class_map, NUMBER_OF_CARS
+
+# struct codes for the ctypes integer types, indexed by byte size (signed codes, upper() for unsigned)
+INTEGER_CODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+FLOAT_CODES = {4: "f", 8: "d"}
+
+PLAYER_CAR = "player"  # Car selection decoding only the car at m_playerCarIndex
+PLAYER_CAR_INDEX_OFFSET = PacketHeader.m_playerCarIndex.offset
+
+# The flat layout of a decoded record: column names and their struct format codes, in value order
+RecordSchema = collections.namedtuple("RecordSchema", ["columns", "codes"])
+
+
+def _simple_type_code(ctypes_type):
+    """
+    Returns the struct format code of a simple ctypes type (c_uint8, c_float, ...).
+    The code is chosen from the size of the type, as ctypes aliases such as c_uint64
+    map to platform dependent codes that do not match the standard struct sizes.
+
+    :param ctypes_type: A simple ctypes type.
+    :return: The matching little-endian struct format code.
+    """
+    type_code = ctypes_type._type_
+    size = ctypes.sizeof(ctypes_type)
+    if type_code in "fd":
+        return FLOAT_CODES[size]
+    if type_code == "?":
+        return "?"
+    if type_code == "c":
+        return "c"
+    code = INTEGER_CODES[size]
+    return code if type_code.islower() else code.upper()
+
+
+def _flatten_fields(ctypes_type, prefix, formats, columns, text_columns):
+    """
+    Walks a ctypes type recursively and appends its struct format codes and flat column names.
+    Column names follow the same convention as ``utils/deserializer.flatten_dict``:
+    nested structures are joined with ``_`` and array elements are suffixed with their index.
+    Unions cannot be expressed as a flat struct layout and are kept as a single raw bytes column.
+
+    :param ctypes_type: The ctypes type to walk (Structure, Union, Array or simple type).
+    :param prefix: The column name of the current field.
+    :param formats: The list of struct format codes being built.
+    :param columns: The list of column names being built.
+    :param text_columns: The list of indices of the null-terminated c_char array columns.
+    """
+    if issubclass(ctypes_type, ctypes.Structure):
+        for field_name, field_type in ctypes_type._fields_:
+            name = f"{prefix}_{field_name}" if prefix else field_name
+            _flatten_fields(field_type, name, formats, columns, text_columns)
+    elif issubclass(ctypes_type, ctypes.Union):
+        formats.append(f"{ctypes.sizeof(ctypes_type)}s")
+        columns.append(prefix)
+    elif issubclass(ctypes_type, ctypes.Array):
+        if ctypes_type._type_ is ctypes.c_char:
+            text_columns.append(len(columns))
+            formats.append(f"{ctypes_type._length_}s")
+            columns.append(prefix)
+        else:
+            for i in range(ctypes_type._length_):
+                _flatten_fields(ctypes_type._type_, f"{prefix}_{i}", formats, columns, text_columns)
+    else:
+        formats.append(_simple_type_code(ctypes_type))
+        columns.append(prefix)
+
+
+def _strip_text(values, text_columns):
+    """Cuts the null-terminated c_char columns of a decoded tuple at their first null byte."""
+    values = list(values)
+    for i in text_columns:
+        values[i] = values[i].split(b"\0", 1)[0]
+    return values
+
+
+class PacketCodec:
+    """
+    A flat codec compiled once from the ``_fields_`` definition of a packet class.
+    Decoding a packet to a flat record is a single ``struct.unpack_from`` call,
+    instead of walking every field with ``getattr``.
+
+    Attributes:
+        packet_class (type): The ctypes packet class the codec was generated from.
+        format (str): The little-endian struct format string of the whole packet.
+        struct (struct.Struct): The compiled struct for the format.
+        columns (tuple): The flat column names, in the same order as the decoded values.
+        text_columns (tuple): Indices of the c_char array columns, decoded as raw padded bytes.
+        size (int): The size in bytes of the packet.
+        schema (RecordSchema): The columns and struct format codes of the decoded records.
+    """
+    def __init__(self, packet_class):
+        formats, columns, text_columns = [], [], []
+        _flatten_fields(packet_class, "", formats, columns, text_columns)
+
+        self.packet_class = packet_class
+        self.format = "<" + "".join(formats)
+        self.struct = struct.Struct(self.format)
+        self.columns = tuple(columns)
+        self.text_columns = tuple(text_columns)
+        self.size = self.struct.size
+        self.schema = RecordSchema(self.columns, tuple(formats))
+
+        if self.size != ctypes.sizeof(packet_class):
+            raise ValueError(f"Codec size {self.size} does not match ctypes size "
+                             f"{ctypes.sizeof(packet_class)} for {packet_class.__name__}")
+
+    def decode(self, buffer, offset=0):
+        """
+        Decodes a packet to a flat tuple of values ordered like ``columns``.
+
+        :param buffer: Any object supporting the buffer protocol (bytes, bytearray, memoryview, mmap, ctypes object).
+        :param offset: The offset of the packet in the buffer.
+        :return: A tuple with one value per column.
+        """
+        return self.struct.unpack_from(buffer, offset)
+
+    def decode_record(self, buffer, offset=0):
+        """
+        Decodes a packet to its schema and flat tuple of values, the form stored by column buffers.
+
+        :param buffer: Any object supporting the buffer protocol.
+        :param offset: The offset of the packet in the buffer.
+        :return: A tuple (schema, values).
+        """
+        return self.schema, self.struct.unpack_from(buffer, offset)
+
+    def decode_dict(self, buffer, offset=0):
+        """
+        Decodes a packet to a flat dictionary, equivalent to ``flatten_dict(ctypes_to_dict(packet))``.
+        Null-terminated strings are cut at their first null byte, as ctypes does.
+
+        :param buffer: Any object supporting the buffer protocol.
+        :param offset: The offset of the packet in the buffer.
+        :return: A dictionary mapping each column name to its value.
+        """
+        values = self.struct.unpack_from(buffer, offset)
+        if self.text_columns:
+            values = _strip_text(values, self.text_columns)
+        return dict(zip(self.columns, values))
+
+    def __repr__(self) -> str:
+        return f"PacketCodec({self.packet_class.__name__}, {len(self.columns)} columns, {self.size} bytes)"
+
+
+header_codec = PacketCodec(PacketHeader)
+
+packet_id_to_codec_map = {
+    packet_id: PacketCodec(packet_class) for packet_id, packet_class in packet_header_to_class_map.items()
+}
+
+packet_class_to_codec_map = {codec.packet_class: codec for codec in packet_id_to_codec_map.values()}
+packet_class_to_codec_map[PacketHeader] = header_codec
+
+
+def get_codec(packet_class):
+    """
+    Returns the codec of a packet class, building and caching it on first use
+    if the class is not one of the top-level packets.
+
+    :param packet_class: A ctypes structure class from ``packet_parser``.
+    :return: The matching PacketCodec.
+    """
+    codec = packet_class_to_codec_map.get(packet_class)
+    if codec is None:
+        codec = packet_class_to_codec_map[packet_class] = PacketCodec(packet_class)
+    return codec
+
+
+def _per_car_field(packet_class):
+    """
+    Returns the name and type of the per-car array field of a packet class
+    (an array of NUMBER_OF_CARS structures such as m_carTelemetryData), or None if it has none.
+
+    :param packet_class: A ctypes packet class.
+    """
+    for field_name, field_type in packet_class._fields_:
+        if (issubclass(field_type, ctypes.Array) and field_type._length_ == NUMBER_OF_CARS
+                and issubclass(field_type._type_, ctypes.Structure)):
+            return field_name, field_type
+    return None
+
+
+class CarSliceCodec:
+    """
+    A codec decoding only some cars of a 22-car packet.
+    The byte offset of a car's element is computed from the offset of the per-car array field
+    and ``ctypes.sizeof`` of the element structure, so only that slice of the datagram is unpacked,
+    together with the header and the other fields of the packet.
+    Column names of selected cars are the same as the full codec's, so a record is a subset of the full record.
+    The player car is decoded under the stable ``<field>_player_`` prefix (e.g. m_lapData_player_m_lastLapTimeInMS)
+    whatever its index, so a recording keeps the same columns when m_playerCarIndex changes.
+    Packets without a per-car array are decoded entirely.
+
+    Attributes:
+        packet_class (type): The ctypes packet class the codec was generated from.
+        car_indices (tuple): The indices of the decoded cars, or None when decoding the player car.
+        player_car (bool): Whether the decoded car is read from m_playerCarIndex in each packet's header.
+        segments (list): (offset, struct, columns, text_columns) of the contiguous fields outside the per-car array.
+        segments_schema (RecordSchema): The columns and format codes of the segments, in decoding order.
+        cars_field (str): The name of the per-car array field, or None if the packet has none.
+        cars_offset (int): The byte offset of the per-car array in the packet.
+        car_size (int): The size in bytes of one car's element.
+        car_codec (PacketCodec): The codec of the car element structure.
+    """
+    def __init__(self, packet_class, car_indices=PLAYER_CAR):
+        self.packet_class = packet_class
+        self.player_car = car_indices == PLAYER_CAR
+        self.car_indices = None if self.player_car else tuple(car_indices)
+        if not self.player_car and any(not 0 <= car_index < NUMBER_OF_CARS for car_index in self.car_indices):
+            raise ValueError(f"Car indices must be between 0 and {NUMBER_OF_CARS - 1}, got {self.car_indices}")
+        self.segments = []
+        self.cars_field = None
+        self.cars_offset = 0
+        self.car_size = 0
+        self.car_codec = None
+        self._car_columns = {}
+        self._schemas = {}
+
+        per_car_field = _per_car_field(packet_class)
+        if per_car_field is None:
+            codec = get_codec(packet_class)
+            self.segments.append((0, codec.struct, codec.columns, codec.text_columns))
+            self.segments_schema = codec.schema
+            return
+
+        self.cars_field, cars_type = per_car_field
+        self.cars_offset = getattr(packet_class, self.cars_field).offset
+        self.car_size = ctypes.sizeof(cars_type._type_)
+        self.car_codec = get_codec(cars_type._type_)
+
+        # Group the fields before and after the per-car array into contiguous segments
+        position = [field_name for field_name, _ in packet_class._fields_].index(self.cars_field)
+        segment_columns, segment_codes = [], []
+        for fields in (packet_class._fields_[:position], packet_class._fields_[position + 1:]):
+            if not fields:
+                continue
+            formats, columns, text_columns = [], [], []
+            for field_name, field_type in fields:
+                _flatten_fields(field_type, field_name, formats, columns, text_columns)
+            offset = getattr(packet_class, fields[0][0]).offset
+            self.segments.append((offset, struct.Struct("<" + "".join(formats)), tuple(columns), tuple(text_columns)))
+            segment_columns += columns
+            segment_codes += formats
+        self.segments_schema = RecordSchema(tuple(segment_columns), tuple(segment_codes))
+
+    def car_columns(self, car_index):
+        """
+        Returns the column names of one car's element, e.g. m_carTelemetryData_0_m_speed.
+
+        :param car_index: The index of the car in the per-car array, or PLAYER_CAR for the player car columns.
+        """
+        columns = self._car_columns.get(car_index)
+        if columns is None:
+            columns = self._car_columns[car_index] = tuple(
+                f"{self.cars_field}_{car_index}_{column}" for column in self.car_codec.columns)
+        return columns
+
+    def selected_cars(self, buffer, offset=0):
+        """
+        Returns the indices of the cars to decode for a packet.
+
+        :param buffer: The buffer holding the packet.
+        :param offset: The offset of the packet in the buffer.
+        """
+        if not self.player_car:
+            return self.car_indices
+        car_index = buffer[offset + PLAYER_CAR_INDEX_OFFSET]
+        # 255 means no player car (spectating); other out of range indices would read past the packet
+        return (car_index,) if car_index < NUMBER_OF_CARS else ()
+
+    def _column_labels(self, car_indices):
+        """Returns the labels of the decoded cars in column names: their indices, or PLAYER_CAR for the player car."""
+        return (PLAYER_CAR,) * len(car_indices) if self.player_car else car_indices
+
+    def schema(self, car_indices):
+        """
+        Returns the schema of the records decoded for a selection of cars, built once per selection.
+
+        :param tuple car_indices: The indices of the decoded cars.
+        """
+        labels = self._column_labels(car_indices)
+        schema = self._schemas.get(labels)
+        if schema is None:
+            columns, codes = self.segments_schema
+            for label in labels:
+                columns += self.car_columns(label)
+                codes += self.car_codec.schema.codes
+            schema = self._schemas[labels] = RecordSchema(columns, codes)
+        return schema
+
+    def decode_record(self, buffer, offset=0):
+        """
+        Decodes the header, the non per-car fields and the selected cars of a packet to a flat tuple.
+        Text columns are kept as raw padded bytes, as with ``PacketCodec.decode``.
+
+        :param buffer: Any object supporting the buffer protocol.
+        :param offset: The offset of the packet in the buffer.
+        :return: A tuple (schema, values), the schema depending on the selected cars.
+        """
+        values = ()
+        for segment_offset, segment_struct, _, _ in self.segments:
+            values += segment_struct.unpack_from(buffer, offset + segment_offset)
+        if self.cars_field is None:
+            return self.segments_schema, values
+
+        car_indices = self.selected_cars(buffer, offset)
+        car_struct = self.car_codec.struct
+        for car_index in car_indices:
+            values += car_struct.unpack_from(buffer, offset + self.cars_offset + car_index * self.car_size)
+        return self.schema(car_indices), values
+
+    def decode_dict(self, buffer, offset=0):
+        """
+        Decodes the header, the non per-car fields and the selected cars of a packet to a flat dictionary.
+
+        :param buffer: Any object supporting the buffer protocol.
+        :param offset: The offset of the packet in the buffer.
+        :return: A dictionary mapping each decoded column name to its value.
+        """
+        record = {}
+        for segment_offset, segment_struct, columns, text_columns in self.segments:
+            values = segment_struct.unpack_from(buffer, offset + segment_offset)
+            record.update(zip(columns, _strip_text(values, text_columns) if text_columns else values))
+        if self.cars_field is None:
+            return record
+
+        car_struct = self.car_codec.struct
+        car_indices = self.selected_cars(buffer, offset)
+        for car_index, label in zip(car_indices, self._column_labels(car_indices)):
+            values = car_struct.unpack_from(buffer, offset + self.cars_offset + car_index * self.car_size)
+            if self.car_codec.text_columns:
+                values = _strip_text(values, self.car_codec.text_columns)
+            record.update(zip(self.car_columns(label), values))
+        return record
+
+    def __repr__(self) -> str:
+        cars = "player car" if self.player_car else f"cars {self.car_indices}"
+        return f"CarSliceCodec({self.packet_class.__name__}, {cars})"
+
+
+def build_car_slice_codecs(car_indices=PLAYER_CAR):
+    """
+    Builds a CarSliceCodec for every packet type.
+
+    :param car_indices: PLAYER_CAR to decode the car at m_playerCarIndex, or an iterable of car indices.
+    :return: A dict mapping each packet id to its CarSliceCodec.
+    """
+    return {packet_id: CarSliceCodec(packet_class, car_indices)
+            for packet_id, packet_class in packet_header_to_class_map.items()}
@@ -0,0 +1,127 @@
+import ctypes
+import numpy as np
+
+import helpers.packets.packet_parser as parser
+from helpers.packets.packet_parser import PacketHeader, packet_header_to_class_map
+
+# numpy integer kinds, indexed by whether the ctypes type is signed
+INTEGER_KINDS = {True: "i", False: "u"}
+
+
+def _simple_dtype(ctypes_type):
+    """
+    Returns the little-endian numpy dtype of a simple ctypes type (c_uint8, c_float, ...).
+
+    :param ctypes_type: A simple ctypes type.
+    :return: The matching numpy dtype string.
+    """
+    type_code = ctypes_type._type_
+    size = ctypes.sizeof(ctypes_type)
+    if type_code in "fd":
+        return f"<f{size}"
+    if type_code == "?":
+        return "?"
+    if type_code == "c":
+        return "S1"
+    return f"<{INTEGER_KINDS[type_code.islower()]}{size}"
+
+
+def ctypes_to_dtype(ctypes_type):
+    """
+    Builds the numpy dtype mirroring a ctypes type.
+    Structures become packed structured dtypes (``_pack_ = 1``), arrays become subarray dtypes,
+    c_char arrays become fixed-size byte strings and unions become structured dtypes whose fields overlap.
+
+    :param ctypes_type: A ctypes type (Structure, Union, Array or simple type).
+    :return: The matching numpy dtype.
+    """
+    if issubclass(ctypes_type, ctypes.Structure):
+        return np.dtype([(name, ctypes_to_dtype(field_type)) for name, field_type in ctypes_type._fields_])
+    if issubclass(ctypes_type, ctypes.Union):
+        return np.dtype({
+            "names": [name for name, _ in ctypes_type._fields_],
+            "formats": [ctypes_to_dtype(field_type) for _, field_type in ctypes_type._fields_],
+            "offsets": [0] * len(ctypes_type._fields_),
+            "itemsize": ctypes.sizeof(ctypes_type),
+        })
+    if issubclass(ctypes_type, ctypes.Array):
+        if ctypes_type._type_ is ctypes.c_char:
+            return np.dtype(f"S{ctypes_type._length_}")
+        return np.dtype((ctypes_to_dtype(ctypes_type._type_), (ctypes_type._length_,)))
+    return np.dtype(_simple_dtype(ctypes_type))
+
+
+def _packet_classes():
+    """Returns every ctypes structure and union class defined in packet_parser."""
+    return [value for value in vars(parser).values()
+            if isinstance(value, type) and issubclass(value, (ctypes.Structure, ctypes.Union))
+            and hasattr(value, "_fields_")]
+
+
+packet_class_to_dtype_map = {packet_class: ctypes_to_dtype(packet_class) for packet_class in _packet_classes()}
+
+packet_id_to_dtype_map = {
+    packet_id: packet_class_to_dtype_map[packet_class] for packet_id, packet_class in packet_header_to_class_map.items()
+}
+
+header_dtype = packet_class_to_dtype_map[PacketHeader]
+
+
+def check_dtypes():
+    """
+    Checks that every dtype has the same itemsize as its ctypes class.
+    Raises a ValueError naming the first class whose layout does not match.
+    """
+    for packet_class, dtype in packet_class_to_dtype_map.items():
+        if dtype.itemsize != ctypes.sizeof(packet_class):
+            raise ValueError(f"dtype itemsize {dtype.itemsize} does not match ctypes size "
+                             f"{ctypes.sizeof(packet_class)} for {packet_class.__name__}")
+
+
+def as_record(packet):
+    """
+    Returns a numpy record view over a ctypes packet without copying it.
+    Nested per-car arrays are exposed as (22,) structured arrays, e.g.
+    ``as_record(packet)["m_carTelemetryData"]["m_speed"]`` gives the speed of every car at once.
+    The view shares the packet memory, so it follows the same ownership rules as the packet.
+
+    :param packet: A ctypes packet instance from packet_parser.
+    :return: A 0-d structured numpy array view of the packet.
+    """
+    return np.frombuffer(packet, dtype=packet_class_to_dtype_map[type(packet)], count=1)[0]
+
+
+def _is_union(dtype):
+    """Returns whether a structured dtype was built from a ctypes Union (every field at offset 0)."""
+    return len(dtype.names) > 1 and all(dtype.fields[name][1] == 0 for name in dtype.names)
+
+
+def flatten_records(records, prefix="", columns=None):
+    """
+    Flattens a structured array into one 1-d array per leaf field, without converting any record to Python objects.
+    Column names follow ``utils/deserializer.flatten_dict`` and the packet codecs:
+    nested structures are joined with ``_`` and array elements are suffixed with their index.
+    As with the codecs, c_char arrays are cut at their first null byte and unions are kept as raw bytes.
+
+    :param numpy.ndarray records: A 1-d structured array, e.g. packets viewed with a dtype of packet_id_to_dtype_map.
+    :param str prefix: The column name of the records. Default is "" (top level).
+    :param dict columns: The dict the columns are added to. Default is None (a new dict).
+    :return: A dict mapping each column name to its array, in field order.
+    """
+    if columns is None:
+        columns = {}
+    dtype = records.dtype
+    if records.ndim > 1:
+        for i in range(records.shape[1]):
+            flatten_records(records[:, i], f"{prefix}_{i}", columns)
+    elif dtype.names is not None:
+        if _is_union(dtype):
+            columns[prefix] = [bytes(value) for value in records.view(np.dtype((np.void, dtype.itemsize)))]
+            return columns
+        for name in dtype.names:
+            flatten_records(records[name], f"{prefix}_{name}" if prefix else name, columns)
+    elif dtype.kind == "S" and dtype.itemsize > 1:
+        columns[prefix] = [value.split(b"\0", 1)[0] for value in records.tolist()]
+    else:
+        columns[prefix] = records
+    return columns
@@ -6,6 +6,8 @@ import time
 from ttkbootstrap import Toplevel, LEFT, Entry, IntVar, Label
 from tkinter import Message, Checkbutton, Button
 from models.frames.base_frame import BaseFrame
+from helpers.packets.packet_parser import detach
+from helpers.packets.packet_dtypes import as_record
 import traceback
 
 drivers: list[Driver] = []
@@ -27,12 +29,16 @@ def update_motion(packet, map_canvas, *args):  # Packet 0
     :param packet: The packet containing motion data for each driver.
     :param map_canvas: The canvas where the map is displayed.
     """
+    motion_data = as_record(packet)["m_carMotionData"]  # (22,) view over every car at once
+    positions_x = motion_data["m_worldPositionX"].tolist()
+    positions_z = motion_data["m_worldPositionZ"].tolist()
     for index in range(min(22, len(drivers))):
-        if drivers[index].worldPositionX != 0:
-            drivers[index].Xmove = packet.m_carMotionData[index].m_worldPositionX - drivers[index].worldPositionX
-            drivers[index].Zmove = packet.m_carMotionData[index].m_worldPositionZ - drivers[index].worldPositionZ
-        drivers[index].worldPositionX = packet.m_carMotionData[index].m_worldPositionX
-        drivers[index].worldPositionZ = packet.m_carMotionData[index].m_worldPositionZ
+        driver = drivers[index]
+        if driver.worldPositionX != 0:
+            driver.Xmove = positions_x[index] - driver.worldPositionX
+            driver.Zmove = positions_z[index] - driver.worldPositionZ
+        driver.worldPositionX = positions_x[index]
+        driver.worldPositionZ = positions_z[index]
     try:
         update_map(map_canvas)
     except Exception as e:
@@ -66,7 +72,7 @@ def update_session(packet, top_frame1, top_frame2, screen, map_canvas):  # Packe
         session.track = packet.m_trackId
         delete_map(map_canvas)
     session.session_id = packet.m_sessionType
-    session.marshal_zones = packet.m_marshalZones  # Array[21]
+    session.marshal_zones = detach(packet.m_marshalZones)  # Array[21], kept beyond the packet's lifetime
     session.marshal_zones[0].m_zone_start = session.marshal_zones[0].m_zoneStart - 1
     session.num_marshal_zones = packet.m_numMarshalZones
     session.safety_car_status = packet.m_safetyCarStatus
@@ -188,7 +194,7 @@ def update_car_setups(packet): # Packet 5
     """
     array = packet.m_carSetups
     for index in range(min(22, len(drivers))):
-        drivers[index].setup_array = array[index]
+        drivers[index].setup_array = detach(array[index])
 
 def update_car_telemetry(packet):  # Packet 6
     """
@@ -200,13 +206,17 @@ def update_car_telemetry(packet):  # Packet 6
 
     :param packet: The packet containing car telemetry data for each driver.
     """
+    telemetry_data = as_record(packet)["m_carTelemetryData"]  # (22,) view over every car at once
+    drs = telemetry_data["m_drs"].tolist()
+    tyres_temp_inner = telemetry_data["m_tyresInnerTemperature"].tolist()
+    tyres_temp_surface = telemetry_data["m_tyresSurfaceTemperature"].tolist()
+    speeds = telemetry_data["m_speed"].tolist()
     for index in range(min(22, len(drivers))):
-        element = packet.m_carTelemetryData[index]
         driver = drivers[index]
-        driver.drs = element.m_drs
-        driver.tyres_temp_inner = element.m_tyresInnerTemperature
-        driver.tyres_temp_surface = element.m_tyresSurfaceTemperature
-        driver.speed = element.m_speed
+        driver.drs = drs[index]
+        driver.tyres_temp_inner = tyres_temp_inner[index]
+        driver.tyres_temp_surface = tyres_temp_surface[index]
+        driver.speed = speeds[index]
         if driver.speed >= 200 and not driver.S200_reached:
             print(f"{driver.position} {driver.name}  = {time.time() - session.start_time}")
             driver.S200_reached = True
@@ -1,14 +1,42 @@
 import ctypes
 import socket
 import pprint
+import time
+
+from network.udp_redirector import UDPRedirector
 
 pp = pprint.PrettyPrinter()
 NUMBER_OF_CARS = 22
+BUFFER_SIZE = 2048
+
+
+def detach(ctypes_obj):
+    """Returns a copy of a ctypes structure or array that owns its own memory.
+    Packets returned by a zero-copy ``Listener`` are views over a reusable receive buffer,
+    so any packet (or nested field) kept after the next few ``get`` calls must be detached first.
+
+    :param ctypes_obj: A ctypes Structure, Union or Array, possibly backed by a shared buffer.
+    :return: An independent copy of the same type.
+    """
+    return type(ctypes_obj).from_buffer_copy(ctypes_obj)
 
 
 class Listener:
     """A UDP listener for receiving F1 telemetry data packets.
-    This class listens for packets on a specified port and can redirect them to another address if needed.
+    This class listens for packets on a specified port and can redirect them to other addresses if needed.
+    Redirected datagrams are handed to a UDPRedirector, which sends them from its own thread.
+
+    In zero-copy mode, datagrams are received with ``recv_into`` into a pool of preallocated
+    buffers and the packet classes are overlaid on them with ``from_buffer``, so no bytes object
+    or packet copy is created per datagram. A returned packet stays valid until the pool wraps around,
+    i.e. for the next ``pool_size - 1`` calls to ``get``. Consumers that keep a packet (or one of
+    its nested structures/arrays) longer than that must take a stable copy with ``detach``.
+
+    When a set of packet ids is given, only the id byte of each raw datagram is read before decoding:
+    datagrams of other types are dropped (but still redirected) and counted per id in ``dropped_packets``.
+    With a DuplicateFilter, duplicate and stale datagrams are dropped the same way, before decoding.
+    Malformed datagrams (shorter than their packet class, or of an unknown packet id) are skipped
+    and counted in ``invalid_packets``.
     Attributes:
 
         port (int): The port to listen on.
@@ -16,14 +44,29 @@ class Listener:
         address (str): The address to redirect packets to.
         redirect (int): Whether to redirect packets (0 or 1).
         redirect_port (int): The port to redirect packets to if redirect is enabled.
+        redirector (UDPRedirector): Forwards the received datagrams when redirect is enabled, or None.
+        zero_copy (bool): Whether packets are decoded in place over the receive buffer pool.
+        buffer_pool (list): Preallocated receive buffers used in zero-copy mode.
+        buffer_index (int): Index of the next buffer of the pool to receive into.
+        packet_ids (set): The packet ids to decode, or None to decode every packet.
+        dropped_packets (dict): Number of datagrams dropped by the packet id filter, per packet id.
+        duplicate_filter (DuplicateFilter): Drops duplicate and stale datagrams, or None.
+        invalid_packets (int): Number of malformed datagrams skipped.
     """
-    def __init__(self, port=20777, address="127.0.0.1", redirect=0, redirect_port=20777):
+    def __init__(self, port=20777, address="127.0.0.1", redirect=0, redirect_port=20777, zero_copy=False,
+                 pool_size=4, packet_ids=None, redirector=None, duplicate_filter=None):
         """Initializes the UDP listener with the specified port and optional redirection settings.
         
         :param int port: The port to listen on. Default is 20777.
         :param str address: The address to redirect the packets to. Default is 127.0.0.1 (localhost).
         :param int redirect: Whether to redirect packets (0 or 1). Default is 0 (no redirection).
         :param int redirect_port: The port to redirect packets to if redirection is enabled. Default is 20777.
+        :param bool zero_copy: Whether to decode packets in place over a reusable buffer pool. Default is False.
+        :param int pool_size: Number of receive buffers in the pool when zero-copy is enabled. Default is 4.
+        :param set packet_ids: The packet ids to decode, the others are dropped. Default is None (decode every packet).
+        :param UDPRedirector redirector: The redirector to use when redirect is enabled, e.g. with several destinations.
+            Default is None (a redirector to address:redirect_port is created).
+        :param DuplicateFilter duplicate_filter: The filter of duplicate and stale datagrams. Default is None (no filter).
         """
 
         self.port = port
@@ -33,6 +76,16 @@ class Listener:
         self.address = address
         self.redirect = redirect
         self.redirect_port = redirect_port
+        if redirect and redirector is None:
+            redirector = UDPRedirector([(address, redirect_port)])
+        self.redirector = redirector
+        self.zero_copy = zero_copy
+        self.buffer_pool = [bytearray(BUFFER_SIZE) for _ in range(max(1, pool_size))]
+        self.buffer_index = 0
+        self.packet_ids = None if packet_ids is None else frozenset(packet_ids)
+        self.dropped_packets = {}
+        self.duplicate_filter = duplicate_filter
+        self.invalid_packets = 0
 
     def reset(self):
         """Resets the UDP listener by closing the current socket and creating a new one."""
@@ -46,18 +99,125 @@ class Listener:
         :param packet: Optional bytes object representing a packet to process.
         :return: A tuple containing the packet header and the packet data, or None if no packet is received.
         """
+        if packet is None and self.zero_copy:
+            return self._get_in_place()
+
         if packet is None:
-            try:
-                packet = self.socket.recv(2048)
-                if self.redirect: self.socket.sendto(packet, (self.address, self.redirect_port))
-            except ConnectionResetError: #Thrown when redirecting on a localhost port that is not ready to read the data
-                return None
-            except:
-                return None
+            while True:
+                try:
+                    packet = self.socket.recv(BUFFER_SIZE)
+                except (BlockingIOError, socket.timeout, ConnectionResetError):  # No datagram available
+                    return None
+                if self.redirect and self.redirector is not None:
+                    self.redirector.forward(packet)
+                if self._is_valid(packet, len(packet)) and self._accepts(packet, len(packet)):
+                    break
+        elif not (self._is_valid(packet, len(packet)) and self._accepts(packet, len(packet))):
+            return None
 
         header = PacketHeader.from_buffer_copy(packet)
         return header, packet_header_to_class_map[header.m_packetId].from_buffer_copy(packet)
+
+    def get_batch(self, max_packets=64, max_time=0.005):
+        """Drains the packets currently waiting on the UDP socket in one go.
+        Reception stops when the socket is empty, when max_packets have been received or when max_time has elapsed,
+        so a whole game frame (one packet of each type) can be processed per call.
+        Malformed and filtered datagrams are skipped by ``get``, so they do not end the batch early.
+        In zero-copy mode the buffer pool is grown to max_packets, and the packets of a batch stay valid
+        until the next call to ``get_batch``.
+
+        :param int max_packets: The maximum number of packets to receive. Default is 64.
+        :param float max_time: The maximum time in seconds spent draining the socket. Default is 0.005.
+        :return: A dict mapping each packet id to the list of received packets, in reception order.
+        """
+        if self.zero_copy and len(self.buffer_pool) < max_packets:
+            self.buffer_pool.extend(bytearray(BUFFER_SIZE) for _ in range(max_packets - len(self.buffer_pool)))
+
+        batch = {}
+        deadline = time.perf_counter() + max_time
+        for _ in range(max_packets):
+            packet_data = self.get()
+            if packet_data is None:
+                break
+            header, packet = packet_data
+            batch.setdefault(header.m_packetId, []).append(packet)
+            if time.perf_counter() > deadline:
+                break
+        return batch
+
+    def _get_in_place(self):
+        """Receives the next datagram into the buffer pool and overlays the packet classes on it.
+        The returned header and packet share the buffer memory (see ``detach`` for ownership).
+
+        :return: A tuple containing the packet header and the packet data, or None if no datagram is waiting.
+            Malformed datagrams are skipped, so None always means that the socket is empty.
+        """
+        buffer = self.buffer_pool[self.buffer_index]
+        while True:
+            try:
+                size = self.socket.recv_into(buffer)
+            except (BlockingIOError, socket.timeout, ConnectionResetError):  # No datagram available
+                return None
+            if self.redirect and self.redirector is not None:
+                self.redirector.forward(memoryview(buffer)[:size])
+            # Invalid and dropped datagrams reuse the same buffer
+            if self._is_valid(buffer, size) and self._accepts(buffer, size):
+                break
+        self.buffer_index = (self.buffer_index + 1) % len(self.buffer_pool)
+
+        header = PacketHeader.from_buffer(buffer)
+        return header, packet_header_to_class_map[header.m_packetId].from_buffer(buffer)
+
+    def _is_valid(self, data, size):
+        """Checks that a raw datagram holds a complete packet of a known packet id,
+        counting it in ``invalid_packets`` when it does not.
+
+        :param data: The raw datagram (bytes or receive buffer).
+        :param int size: The size of the datagram in the buffer.
+        :return: True if the datagram can be decoded, False otherwise.
+        """
+        if size > PACKET_ID_OFFSET:
+            packet_class = packet_header_to_class_map.get(data[PACKET_ID_OFFSET])
+            if packet_class is not None and size >= ctypes.sizeof(packet_class):
+                return True
+        self.invalid_packets += 1
+        return False
+
+    def _accepts(self, data, size):
+        """Checks whether a raw datagram should be decoded: subscribed to, and neither a duplicate nor stale.
+
+        :param data: The raw datagram (bytes or receive buffer).
+        :param int size: The size of the datagram in the buffer.
+        :return: True if the datagram should be decoded, False otherwise.
+        """
+        if not self._is_subscribed(data, size):
+            return False
+        return self.duplicate_filter is None or self.duplicate_filter.accept(data, size)
+
+    def _is_subscribed(self, data, size):
+        """Checks the packet id byte of a raw datagram against the subscribed packet ids,
+        counting the datagram in ``dropped_packets`` when it is not wanted.
+
+        :param data: The raw datagram (bytes or receive buffer).
+        :param int size: The size of the datagram in the buffer.
+        :return: True if the datagram should be decoded, False otherwise.
+        """
+        if self.packet_ids is None:
+            return True
+        if size <= PACKET_ID_OFFSET:
+            return False
+        packet_id = data[PACKET_ID_OFFSET]
+        if packet_id in self.packet_ids:
+            return True
+        self.dropped_packets[packet_id] = self.dropped_packets.get(packet_id, 0) + 1
+        return False
     
+    def close(self):
+        """Closes the UDP socket and stops the redirector, if any."""
+        self.socket.close()
+        if self.redirector is not None:
+            self.redirector.close()
+
     def __str__(self) -> str:
         return str(self.__dict__)
     
@@ -97,6 +257,16 @@ class PacketMixin(object):
         """
         return cls.from_buffer_copy(buffer)
 
+    def copy(self):
+        """Returns a copy of the packet that owns its memory
+
+        Returns:
+            (Packet):
+                - A packet independent from the buffer it was decoded from
+
+        """
+        return detach(self)
+
     def to_dict(self):
         """Returns a ``dict`` with key-values derived from _fields_"""
         return {k: self.get_value(k) for k, _ in self._fields_}
@@ -152,6 +322,9 @@ class PacketHeader(ctypes.LittleEndianStructure):
     ]
 
 
+PACKET_ID_OFFSET = PacketHeader.m_packetId.offset  # Byte 6 of every datagram
+
+
 class CarMotionData(Packet):
     _fields_ = [
         ("m_worldPositionX", ctypes.c_float),  # World space X position
@@ -0,0 +1,198 @@
+import asyncio
+import socket
+
+import helpers.packets.packet_parser as parser
+
+
+class AsyncConsumer:
+    """
+    A consumer registered on an AsyncListener.
+    Packets are pushed into a bounded queue and awaited one by one by a dedicated task,
+    so a slow consumer never blocks reception or the other consumers.
+    Attributes:
+        callback (coroutine function): Called with (header, packet), or with the raw datagram if raw is True.
+        packet_ids (frozenset): The packet ids the consumer receives, or None for every packet.
+        raw (bool): Whether the consumer receives the raw datagram instead of the decoded packet.
+        queue (asyncio.Queue): The packets waiting to be consumed.
+        dropped (int): Number of packets dropped because the queue was full.
+        task (asyncio.Task): The task draining the queue.
+    """
+    def __init__(self, callback, packet_ids=None, raw=False, queue_size=256):
+        self.callback = callback
+        self.packet_ids = None if packet_ids is None else frozenset(packet_ids)
+        self.raw = raw
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.task = None
+
+    def wants(self, packet_id):
+        """Returns True if the consumer is subscribed to the packet id."""
+        return self.packet_ids is None or packet_id in self.packet_ids
+
+    def push(self, item):
+        """Queues a packet for the consumer, dropping it if the queue is full."""
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def run(self):
+        """Consumes the queued packets until the task is cancelled."""
+        while True:
+            item = await self.queue.get()
+            try:
+                if self.raw:
+                    await self.callback(item)
+                else:
+                    await self.callback(*item)
+            except Exception as e:
+                print(f"Error in consumer {getattr(self.callback, '__name__', self.callback)}: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class TelemetryProtocol(asyncio.DatagramProtocol):
+    """
+    The asyncio datagram protocol of one listening port, forwarding every datagram to its AsyncListener.
+    Attributes:
+        listener (AsyncListener): The listener dispatching the datagrams to the consumers.
+    """
+    def __init__(self, listener):
+        self.listener = listener
+
+    def datagram_received(self, data, addr):
+        self.listener.dispatch(data)
+
+    def error_received(self, exc):
+        print(f"UDP error: {exc}")
+
+
+class AsyncListener:
+    """
+    An asyncio ingestion backend for F1 telemetry packets, built on ``loop.create_datagram_endpoint``.
+    The event loop sleeps until a datagram arrives, so CPU usage is near zero when the game is paused,
+    and several ports and consumers (UI updater, recorder, redirector...) share a single loop.
+    Each datagram is decoded at most once, and only if a decoding consumer is subscribed to its packet id.
+    Attributes:
+        ports (list): The ports to listen on.
+        sockets (list): Already bound sockets to listen on, in addition to the ports.
+        consumers (list): The registered AsyncConsumer instances.
+        transports (list): The datagram transports of the listened ports and sockets.
+        dropped_packets (dict): Number of datagrams no consumer was subscribed to, per packet id.
+        received_packets (int): Number of datagrams received.
+    """
+    def __init__(self, ports=(20777,), sockets=()):
+        self.ports = [int(port) for port in ports]
+        self.sockets = list(sockets)
+        self.consumers = []
+        self.transports = []
+        self.dropped_packets = {}
+        self.received_packets = 0
+
+    def add_consumer(self, callback, packet_ids=None, raw=False, queue_size=256):
+        """
+        Registers an async consumer. Must be called before ``start``.
+
+        :param callback: A coroutine function called with (header, packet), or with the raw datagram bytes if raw is True.
+        :param packet_ids: The packet ids to receive. Default is None (every packet).
+        :param bool raw: Whether to receive the raw datagram instead of the decoded packet. Default is False.
+        :param int queue_size: The maximum number of packets waiting for the consumer. Default is 256.
+        :return: The AsyncConsumer, whose ``dropped`` counter reports overruns.
+        """
+        consumer = AsyncConsumer(callback, packet_ids, raw, queue_size)
+        self.consumers.append(consumer)
+        return consumer
+
+    async def start(self):
+        """Opens the datagram endpoints and starts the consumer tasks."""
+        loop = asyncio.get_running_loop()
+        for consumer in self.consumers:
+            consumer.task = asyncio.create_task(consumer.run())
+        for port in self.ports:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: TelemetryProtocol(self), local_addr=('0.0.0.0', port), family=socket.AF_INET)
+            self.transports.append(transport)
+        for udp_socket in self.sockets:
+            transport, _ = await loop.create_datagram_endpoint(lambda: TelemetryProtocol(self), sock=udp_socket)
+            self.transports.append(transport)
+
+    def dispatch(self, data):
+        """
+        Pushes a datagram to the consumers subscribed to its packet id.
+        The packet id byte is read first, and the datagram is decoded only if a decoding consumer wants it.
+
+        :param bytes data: The raw datagram.
+        """
+        self.received_packets += 1
+        if len(data) <= parser.PACKET_ID_OFFSET:
+            return
+        packet_id = data[parser.PACKET_ID_OFFSET]
+        decoded = None
+        delivered = False
+        for consumer in self.consumers:
+            if not consumer.wants(packet_id):
+                continue
+            if consumer.raw:
+                consumer.push(data)
+            else:
+                if decoded is None:
+                    decoded = self.decode(data)
+                    if decoded is None:
+                        return
+                consumer.push(decoded)
+            delivered = True
+        if not delivered:
+            self.dropped_packets[packet_id] = self.dropped_packets.get(packet_id, 0) + 1
+
+    @staticmethod
+    def decode(data):
+        """
+        Decodes a raw datagram to its header and packet.
+
+        :param bytes data: The raw datagram.
+        :return: A tuple (header, packet), or None if the datagram is not a valid packet.
+        """
+        packet_class = parser.packet_header_to_class_map.get(data[parser.PACKET_ID_OFFSET])
+        if packet_class is None or len(data) < packet_class.size():
+            return None
+        packet = packet_class.from_buffer_copy(data)
+        return packet.m_header, packet
+
+    async def stop(self, timeout=1.0):
+        """
+        Closes the endpoints, lets the consumers finish their queued packets and cancels their tasks.
+
+        :param float timeout: The maximum time in seconds to wait for the queues to drain. Default is 1.0.
+        """
+        for transport in self.transports:
+            transport.close()
+        self.transports = []
+        try:
+            await asyncio.wait_for(asyncio.gather(*(consumer.queue.join() for consumer in self.consumers)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for consumer in self.consumers:
+            if consumer.task is not None:
+                consumer.task.cancel()
+        await asyncio.gather(*(consumer.task for consumer in self.consumers if consumer.task is not None),
+                             return_exceptions=True)
+
+
+def redirect_consumer(address, port):
+    """
+    Returns a raw consumer forwarding every datagram it receives to another address,
+    e.g. ``listener.add_consumer(redirect_consumer("127.0.0.1", 20776), raw=True)``.
+
+    :param str address: The address to redirect the datagrams to.
+    :param int port: The port to redirect the datagrams to.
+    """
+    transport = None
+
+    async def redirect(data):
+        nonlocal transport
+        if transport is None:
+            transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                asyncio.DatagramProtocol, remote_addr=(address, int(port)))
+        transport.sendto(data)
+
+    return redirect
@@ -0,0 +1,107 @@
+import struct
+
+from helpers.packets.packet_parser import PACKET_ID_OFFSET, PacketHeader
+
+SESSION_UID_OFFSET = PacketHeader.m_sessionUID.offset
+OVERALL_FRAME_OFFSET = PacketHeader.m_overallFrameIdentifier.offset
+HEADER_KEY = struct.Struct("<Q")
+OVERALL_FRAME = struct.Struct("<I")
+MIN_SIZE = OVERALL_FRAME_OFFSET + OVERALL_FRAME.size
+
+# Packets legitimately sent several times per frame (one event per packet, one car per packet),
+# which cannot be deduplicated on their frame identifier
+EVENT_PACKET_ID = 3
+SESSION_HISTORY_PACKET_ID = 11
+TYRE_SETS_PACKET_ID = 12
+MULTIPLE_PER_FRAME_PACKET_IDS = frozenset((EVENT_PACKET_ID, SESSION_HISTORY_PACKET_ID, TYRE_SETS_PACKET_ID))
+
+
+class DuplicateFilter:
+    """
+    Drops duplicate and stale datagrams before they are decoded, from the raw header bytes only.
+    For each packet id of the current session (m_sessionUID), the filter keeps the highest
+    m_overallFrameIdentifier seen and a bit mask of the frames seen in the window below it.
+    A datagram is a duplicate if its frame is already in the mask, and stale if it is older than the window.
+    m_overallFrameIdentifier does not go back on flashbacks, so replayed frames are not mistaken for duplicates.
+    Attributes:
+        window (int): The number of frames below the highest one in which late datagrams are still accepted.
+        packet_ids (frozenset): The packet ids that are deduplicated, the others always pass.
+        session_uid (int): The m_sessionUID of the current session.
+        accepted (int): Number of datagrams accepted.
+        duplicates (int): Number of duplicate datagrams dropped.
+        stale (int): Number of datagrams dropped because they were older than the window.
+        sessions (int): Number of sessions seen.
+    """
+    def __init__(self, window=256, packet_ids=None):
+        """
+        :param int window: The size of the sliding window, in frames. Default is 256 (about 4 seconds at 60 Hz).
+        :param packet_ids: The packet ids to deduplicate.
+            Default is None (every packet id except the ones sent several times per frame).
+        """
+        self.window = int(window)
+        if packet_ids is None:
+            packet_ids = frozenset(range(256)) - MULTIPLE_PER_FRAME_PACKET_IDS
+        self.packet_ids = frozenset(packet_ids)
+        self.session_uid = None
+        self.accepted = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.sessions = 0
+        self._mask_limit = (1 << self.window) - 1
+        self._highest_frames = {}
+        self._seen_masks = {}
+
+    def accept(self, data, size=None):
+        """
+        Checks a raw datagram against the window of its packet id and records its frame.
+
+        :param data: The raw datagram (bytes or receive buffer).
+        :param int size: The size of the datagram in the buffer. Default is None (len(data)).
+        :return: True if the datagram is new, False if it is a duplicate or stale.
+        """
+        if (len(data) if size is None else size) < MIN_SIZE:
+            return True
+        packet_id = data[PACKET_ID_OFFSET]
+        if packet_id not in self.packet_ids:
+            self.accepted += 1
+            return True
+        session_uid = HEADER_KEY.unpack_from(data, SESSION_UID_OFFSET)[0]
+        if session_uid != self.session_uid:
+            self.session_uid = session_uid
+            self.sessions += 1
+            self._highest_frames.clear()
+            self._seen_masks.clear()
+        frame = OVERALL_FRAME.unpack_from(data, OVERALL_FRAME_OFFSET)[0]
+
+        highest = self._highest_frames.get(packet_id)
+        if highest is None or frame > highest:
+            # Bit n of the mask is set when frame (highest - n) has been seen
+            if highest is None or frame - highest >= self.window:
+                mask = 0
+            else:
+                mask = (self._seen_masks[packet_id] << (frame - highest)) & self._mask_limit
+            self._highest_frames[packet_id] = frame
+            self._seen_masks[packet_id] = mask | 1
+            self.accepted += 1
+            return True
+        age = highest - frame
+        if age >= self.window:
+            self.stale += 1
+            return False
+        bit = 1 << age
+        mask = self._seen_masks[packet_id]
+        if mask & bit:
+            self.duplicates += 1
+            return False
+        self._seen_masks[packet_id] = mask | bit
+        self.accepted += 1
+        return True
+
+    def statistics(self):
+        """Returns the counters of the filter."""
+        return {"accepted": self.accepted, "duplicates": self.duplicates, "stale": self.stale,
+                "sessions": self.sessions}
+
+    def __repr__(self) -> str:
+        return (f"DuplicateFilter(window={self.window}, accepted={self.accepted}, "
+                f"duplicates={self.duplicates}, stale={self.stale})")
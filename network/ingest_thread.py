@@ -0,0 +1,122 @@
+import threading
+
+OVERWRITE_OLDEST = "overwrite_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class RingBuffer:
+    """
+    A fixed-capacity, thread-safe ring buffer between the network thread and the UI thread.
+    When the buffer is full, either the oldest item is overwritten or the new item is dropped,
+    and the overrun is counted instead of blocking the producer.
+    Attributes:
+        capacity (int): The maximum number of items held.
+        policy (str): OVERWRITE_OLDEST or DROP_NEWEST.
+        overruns (int): Number of items lost because the buffer was full.
+        written (int): Number of items put into the buffer.
+    """
+    def __init__(self, capacity=1024, policy=OVERWRITE_OLDEST):
+        if policy not in (OVERWRITE_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown ring buffer policy: {policy}")
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.overruns = 0
+        self.written = 0
+        self._slots = [None] * self.capacity
+        self._head = 0  # Index of the oldest item
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        """
+        Adds an item to the buffer.
+
+        :param item: The item to add.
+        :return: False if the item was dropped (DROP_NEWEST policy on a full buffer), True otherwise.
+        """
+        with self._lock:
+            self.written += 1
+            if self._size == self.capacity:
+                self.overruns += 1
+                if self.policy == DROP_NEWEST:
+                    return False
+                self._slots[self._head] = item
+                self._head = (self._head + 1) % self.capacity
+                return True
+            self._slots[(self._head + self._size) % self.capacity] = item
+            self._size += 1
+            return True
+
+    def drain(self, max_items=None):
+        """
+        Removes and returns the buffered items, oldest first.
+
+        :param int max_items: The maximum number of items to remove. Default is None (every item).
+        :return: A list of items.
+        """
+        with self._lock:
+            count = self._size if max_items is None else min(max_items, self._size)
+            items = []
+            for _ in range(count):
+                items.append(self._slots[self._head])
+                self._slots[self._head] = None
+                self._head = (self._head + 1) % self.capacity
+            self._size -= count
+            return items
+
+    def __len__(self):
+        return self._size
+
+
+class IngestThread(threading.Thread):
+    """
+    A daemon thread receiving packets from a Listener into a RingBuffer, independently of the UI.
+    The socket is used in blocking mode with a timeout, so the thread sleeps while no packet arrives
+    and checks regularly whether it has been stopped.
+    Packets cross threads, so the listener must not be in zero-copy mode.
+    A datagram that cannot be decoded is counted and skipped, so bad input never stops the thread.
+    Attributes:
+        listener (Listener): The listener decoding the packets.
+        ring_buffer (RingBuffer): The buffer the decoded (header, packet) tuples are written to.
+        timeout (float): The socket timeout in seconds.
+        received (int): Number of packets received.
+        decode_errors (int): Number of datagrams that could not be decoded.
+    """
+    def __init__(self, listener, ring_buffer, timeout=0.1):
+        super().__init__(name="telemetry-ingest", daemon=True)
+        if listener.zero_copy:
+            raise ValueError("The ingest thread needs a listener that copies its packets (zero_copy=False)")
+        self.listener = listener
+        self.ring_buffer = ring_buffer
+        self.timeout = timeout
+        self.received = 0
+        self.decode_errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        udp_socket = None
+        while not self._stop_event.is_set():
+            if self.listener.socket is not udp_socket:  # The socket is recreated by Listener.reset
+                udp_socket = self.listener.socket
+                try:
+                    udp_socket.settimeout(self.timeout)
+                except OSError:
+                    break
+            try:
+                packet_data = self.listener.get()
+            except OSError:  # The socket was closed, e.g. while the listener is being reset
+                if self._stop_event.wait(self.timeout):
+                    break
+                continue
+            except (ValueError, KeyError):  # A malformed datagram the listener did not reject
+                self.decode_errors += 1
+                continue
+            if packet_data is not None:
+                self.received += 1
+                self.ring_buffer.put(packet_data)
+
+    def stop(self):
+        """Stops the thread and waits for it to finish."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=self.timeout * 5)
@@ -1,33 +1,87 @@
 import helpers.packets.packet_parser as parser
+from network.duplicate_filter import DuplicateFilter
+from network.ingest_thread import IngestThread, RingBuffer, OVERWRITE_OLDEST
+from network.udp_redirector import UDPRedirector
 
 class UDPListener:
     """
-    A class to listen for UDP packets on a specified port and redirect them to a given IP address and port.
+    A class to listen for UDP packets on a specified port and redirect them to one or more IP addresses and ports.
     This class uses the `Listener` from the `packet_parser` module to handle incoming UDP packets.
     Attributes:
         port (int): The port number to listen on.
         redirect (bool): Whether to redirect the packets.
         ip_address (str): The IP address to redirect packets to.
         redirect_port (int): The port number to redirect packets to.
+        redirect_targets (list): The (address, port) destinations of the redirect, ip_address:redirect_port by default.
+        zero_copy (bool): Whether packets are decoded in place over a reusable buffer pool.
+        packet_ids (set): The packet ids to decode, or None to decode every packet.
+        duplicate_filter (DuplicateFilter): Drops duplicate and stale datagrams before decoding, or None.
         listener (Listener): An instance of the Listener class to handle UDP packets.
+        ingest_thread (IngestThread): The network thread started by ``start_thread``, if any.
     """
-    def __init__(self, port, redirect, ip_address, redirect_port):
+    def __init__(self, port, redirect, ip_address, redirect_port, zero_copy=False, packet_ids=None,
+                 redirect_targets=None, redirect_queue_size=256, deduplicate=True):
         self.port = int(port)
         self.redirect = redirect
         self.ip_address = ip_address
         self.redirect_port = int(redirect_port)
+        self.zero_copy = zero_copy
+        self.packet_ids = packet_ids
+        self.redirect_targets = redirect_targets or [(self.ip_address, self.redirect_port)]
+        self.duplicate_filter = DuplicateFilter() if deduplicate else None
 
         self.listener = parser.Listener(
             port=self.port,
             redirect=self.redirect,
             address=self.ip_address,
-            redirect_port=self.redirect_port
+            redirect_port=self.redirect_port,
+            zero_copy=self.zero_copy,
+            packet_ids=self.packet_ids,
+            redirector=UDPRedirector(self.redirect_targets, redirect_queue_size) if self.redirect else None,
+            duplicate_filter=self.duplicate_filter
         )
+        self.ingest_thread = None
 
     def receive(self):
-        """Receives data from the UDP socket."""
+        """Receives data from the UDP socket.
+        In zero-copy mode the returned packet is only valid until the listener's buffer pool wraps around."""
         return self.listener.get()
 
+    def receive_batch(self, max_packets=64, max_time=0.005):
+        """Receives every packet currently available on the UDP socket, grouped by packet id.
+
+        :param int max_packets: The maximum number of packets to receive. Default is 64.
+        :param float max_time: The maximum time in seconds spent draining the socket. Default is 0.005.
+        :return: A dict mapping each packet id to the list of received packets.
+        """
+        return self.listener.get_batch(max_packets=max_packets, max_time=max_time)
+
+    def dropped_packets(self):
+        """Returns the number of packets dropped by the packet id filter, per packet id."""
+        return self.listener.dropped_packets
+
+    def duplicate_statistics(self):
+        """Returns the accepted, duplicate and stale counters of the duplicate filter."""
+        return self.duplicate_filter.statistics() if self.duplicate_filter is not None else {}
+
+    def redirect_statistics(self):
+        """Returns the sent, dropped and error counters of every redirect destination."""
+        return self.listener.redirector.statistics() if self.listener.redirector is not None else {}
+
+    def start_thread(self, capacity=1024, policy=OVERWRITE_OLDEST):
+        """Starts receiving on a dedicated network thread writing into a ring buffer.
+
+        :param int capacity: The number of packets the ring buffer holds. Default is 1024.
+        :param str policy: What to do when the buffer is full, OVERWRITE_OLDEST or DROP_NEWEST. Default is OVERWRITE_OLDEST.
+        :return: The RingBuffer to drain the (header, packet) tuples from.
+        """
+        ring_buffer = RingBuffer(capacity, policy)
+        self.ingest_thread = IngestThread(self.listener, ring_buffer)
+        self.ingest_thread.start()
+        return ring_buffer
+
     def close(self):
-        """Closes the socket connection."""
-        self.listener.socket.close()
\ No newline at end of file
+        """Stops the network thread, if any, and closes the socket connection."""
+        if self.ingest_thread is not None:
+            self.ingest_thread.stop()
+        self.listener.close()
\ No newline at end of file
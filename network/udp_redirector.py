@@ -0,0 +1,111 @@
+import collections
+import socket
+import threading
+
+
+class RedirectTarget:
+    """
+    A destination of the UDP redirect, with its own bounded send queue.
+    Attributes:
+        address (str): The IP address to send the datagrams to.
+        port (int): The port to send the datagrams to.
+        queue_size (int): The maximum number of datagrams waiting to be sent.
+        queue (collections.deque): The datagrams waiting to be sent.
+        sent (int): Number of datagrams sent.
+        dropped (int): Number of datagrams dropped because the queue was full.
+        errors (int): Number of datagrams that could not be sent.
+        last_error (str): The last send error, if any.
+    """
+    def __init__(self, address, port, queue_size=256):
+        self.address = address
+        self.port = int(port)
+        self.queue_size = int(queue_size)
+        self.queue = collections.deque()
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    def __repr__(self) -> str:
+        return f"{self.address}:{self.port} (sent={self.sent}, dropped={self.dropped}, errors={self.errors})"
+
+
+class UDPRedirector:
+    """
+    Forwards received datagrams to N destinations from a separate sender thread,
+    so redirecting never adds syscall latency to the receive and decode path.
+    Each destination has its own bounded queue and drop counter: a slow or unreachable
+    destination loses its own datagrams without delaying the others.
+    Send errors are counted per destination instead of being silently ignored.
+    Attributes:
+        targets (list): The RedirectTarget destinations.
+        socket (socket.socket): The UDP socket used to send the datagrams.
+        thread (threading.Thread): The sender thread.
+    """
+    def __init__(self, targets, queue_size=256):
+        """
+        :param targets: An iterable of (address, port) tuples.
+        :param int queue_size: The maximum number of datagrams queued per destination. Default is 256.
+        """
+        self.targets = [RedirectTarget(address, port, queue_size) for address, port in targets]
+        self.socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+        self._condition = threading.Condition()
+        self._running = True
+        self.thread = threading.Thread(target=self._send_loop, name="udp-redirect", daemon=True)
+        self.thread.start()
+
+    def forward(self, data):
+        """
+        Queues a datagram for every destination. Never blocks.
+
+        :param data: The datagram, as bytes or any buffer (copied if it is not bytes).
+        """
+        if not self.targets:
+            return
+        if not isinstance(data, bytes):
+            data = bytes(data)  # The receive buffer may be reused before the datagram is sent
+        with self._condition:
+            for target in self.targets:
+                if len(target.queue) >= target.queue_size:
+                    target.dropped += 1
+                else:
+                    target.queue.append(data)
+            self._condition.notify()
+
+    def _send_loop(self):
+        """Sends the queued datagrams to their destinations until the redirector is closed."""
+        while True:
+            with self._condition:
+                while self._running and not any(target.queue for target in self.targets):
+                    self._condition.wait()
+                if not self._running:
+                    return
+                pending = [(target, list(target.queue)) for target in self.targets if target.queue]
+                for target, _ in pending:
+                    target.queue.clear()
+            for target, datagrams in pending:
+                for data in datagrams:
+                    try:
+                        self.socket.sendto(data, (target.address, target.port))
+                        target.sent += 1
+                    except OSError as e:  # Unreachable destination, ICMP port unreachable on Windows...
+                        target.errors += 1
+                        target.last_error = str(e)
+
+    def statistics(self):
+        """
+        Returns the send statistics of every destination.
+
+        :return: A dict mapping "address:port" to a dict of sent, dropped, errors and queued datagrams.
+        """
+        return {f"{target.address}:{target.port}": {"sent": target.sent, "dropped": target.dropped,
+                                                    "errors": target.errors, "queued": len(target.queue)}
+                for target in self.targets}
+
+    def close(self):
+        """Stops the sender thread and closes its socket."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.thread.join(timeout=1)
+        self.socket.close()
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Add the repository root to the path, as the scripts of utils do
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
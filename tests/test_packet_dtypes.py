@@ -0,0 +1,21 @@
+import ctypes
+import pytest
+
+from helpers.packets.packet_dtypes import as_record, check_dtypes, packet_class_to_dtype_map
+from helpers.packets.packet_parser import PacketCarTelemetryData
+
+
+@pytest.mark.parametrize("packet_class", list(packet_class_to_dtype_map), ids=lambda packet_class: packet_class.__name__)
+def test_dtype_itemsize_matches_ctypes_size(packet_class):
+    assert packet_class_to_dtype_map[packet_class].itemsize == ctypes.sizeof(packet_class)
+
+
+def test_check_dtypes():
+    check_dtypes()
+
+
+def test_as_record_shares_packet_memory():
+    packet = PacketCarTelemetryData()
+    record = as_record(packet)
+    record["m_carTelemetryData"]["m_speed"][3] = 287
+    assert packet.m_carTelemetryData[3].m_speed == 287
@@ -0,0 +1,39 @@
+import time
+import numpy as np
+import pandas as pd
+from hashlib import md5
+
+from sanitize_all_circuits import compute_setup_hash
+
+def benchmark_setup_hash(rows: int = 1_000_000, distinct_setups: int = 50):
+    """
+    Compara el hash vectorizado de reglajes con el md5 por fila sobre una tabla sintética,
+    y comprueba que ambos identifican los mismos reglajes únicos.
+
+    :param int rows: Número de filas de la tabla sintética.
+    :param int distinct_setups: Número de reglajes distintos en la tabla.
+    """
+    rng = np.random.default_rng(0)
+    setups = pd.DataFrame({
+        f"m_carSetups_0_{name}": rng.integers(0, 100, distinct_setups).astype(dtype)
+        for name, dtype in [("m_frontWing", "uint8"), ("m_rearWing", "uint8"), ("m_onThrottle", "uint8"),
+                            ("m_offThrottle", "uint8"), ("m_brakePressure", "uint8"), ("m_ballast", "uint8")]
+    })
+    setups["m_carSetups_0_m_frontLeftTyrePressure"] = rng.uniform(20, 30, distinct_setups).astype("float32")
+    setup_data = setups.iloc[rng.integers(0, distinct_setups, rows)].reset_index(drop=True)
+    setup_cols = list(setup_data.columns)
+
+    start = time.perf_counter()
+    vectorized = compute_setup_hash(setup_data, setup_cols)
+    vectorized_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_row = setup_data[setup_cols].apply(lambda row: md5(str(tuple(row)).encode()).hexdigest(), axis=1)
+    per_row_time = time.perf_counter() - start
+
+    same_groups = (vectorized.groupby(per_row.values).nunique() == 1).all() and vectorized.nunique() == per_row.nunique()
+    print(f"{rows} filas: md5 por fila {per_row_time:.2f}s, hash vectorizado {vectorized_time:.3f}s "
+          f"({per_row_time / vectorized_time:.0f}x), mismos reglajes únicos: {same_groups}")
+
+if __name__ == "__main__":
+    benchmark_setup_hash()
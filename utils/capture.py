@@ -0,0 +1,662 @@
+import os
+import sys
+import ctypes
+import lzma
+import mmap
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from helpers.packets.packet_parser import PACKET_ID_OFFSET, PacketHeader, packet_header_to_class_map
+
+# Raw capture format:
+#   file header : CAPTURE_MAGIC (8 bytes)
+#   each record : receive timestamp (float64, seconds since epoch), datagram length (uint16),
+#                 packet id (uint8), followed by the datagram bytes
+CAPTURE_MAGIC = b"F124CAP\x01"
+RECORD_HEADER = struct.Struct("<dHB")
+CAPTURE_EXTENSION = ".f1cap"
+INDEX_EXTENSION = ".idx.npz"
+
+# Sidecar index of a capture, one row per record (offset is the offset of the datagram in the capture file)
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("size", "<u2"),
+    ("packet_id", "u1"),
+    ("timestamp", "<f8"),
+    ("session_uid", "<u8"),
+    ("session_time", "<f4"),
+    ("frame_identifier", "<u4"),
+])
+HEADER_FIELDS = struct.Struct("<QfI")  # m_sessionUID, m_sessionTime, m_frameIdentifier
+HEADER_FIELDS_OFFSET = PacketHeader.m_sessionUID.offset
+
+# Compressed archive format:
+#   file header : ARCHIVE_MAGIC (8 bytes)
+#   each block  : BLOCK_HEADER, followed by the compressed content of the block, which is a sequence
+#                 of capture records (RECORD_HEADER + datagram) decompressible independently of the other blocks
+ARCHIVE_MAGIC = b"F124ARC\x01"
+ARCHIVE_EXTENSION = ".f1arc"
+ZLIB = "zlib"
+LZMA = "lzma"
+COMPRESSION_CODES = {ZLIB: 1, LZMA: 2}
+# compression code, compressed size, raw size, records, then the receive timestamp,
+# m_sessionUID, m_sessionTime and m_frameIdentifier of the first record of the block
+BLOCK_HEADER = struct.Struct("<BIIIdQfI")
+
+# Block index of an archive, one row per block (offset is the offset of the compressed content in the file)
+BLOCK_INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("compressed_size", "<u4"),
+    ("raw_size", "<u4"),
+    ("compression", "u1"),
+    ("records", "<u4"),
+    ("first_record", "<u8"),
+    ("timestamp", "<f8"),
+    ("session_uid", "<u8"),
+    ("session_time", "<f4"),
+    ("frame_identifier", "<u4"),
+])
+
+
+def compress_block(block, compression=ZLIB, level=None):
+    """
+    Compresses the content of an archive block.
+
+    :param bytes block: The capture records of the block.
+    :param str compression: ZLIB or LZMA. Default is ZLIB.
+    :param int level: The compression level (zlib) or preset (lzma). Default is None (the library default).
+    """
+    if compression == ZLIB:
+        return zlib.compress(block, -1 if level is None else level)
+    if compression == LZMA:
+        return lzma.compress(block, preset=level)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def decompress_block(data, compression_code):
+    """
+    Decompresses the content of an archive block.
+
+    :param data: The compressed content.
+    :param int compression_code: The compression code of the block header.
+    """
+    if compression_code == COMPRESSION_CODES[ZLIB]:
+        return zlib.decompress(data)
+    if compression_code == COMPRESSION_CODES[LZMA]:
+        return lzma.decompress(data)
+    raise ValueError(f"Unknown compression code: {compression_code}")
+
+
+def first_record_fields(block):
+    """
+    Returns the receive timestamp and the header fields of the first record of a block of capture records.
+
+    :param block: The capture records.
+    :return: A tuple (timestamp, session_uid, session_time, frame_identifier).
+    """
+    if len(block) < RECORD_HEADER.size:
+        return 0.0, 0, 0.0, 0
+    timestamp, size, _ = RECORD_HEADER.unpack_from(block, 0)
+    if size < ctypes.sizeof(PacketHeader) or len(block) < RECORD_HEADER.size + size:
+        return (timestamp, 0, 0.0, 0)
+    return (timestamp,) + HEADER_FIELDS.unpack_from(block, RECORD_HEADER.size + HEADER_FIELDS_OFFSET)
+
+
+class CaptureWriter:
+    """
+    Streams raw datagrams to a capture file as they are received.
+    Records are appended to an in-memory block, and full blocks are written by a background thread,
+    so memory stays flat whatever the session length and the recording thread never waits on the disk.
+    The current block is also handed to the writer every flush_interval seconds,
+    so a crash loses at most the last flush_interval seconds of data.
+    At most max_pending blocks wait for the writer thread: when the disk cannot keep up, writing blocks
+    instead of letting memory grow. A write error (full disk...) is raised by the next ``write`` and by ``close``.
+    Attributes:
+        file_path (str): The path of the capture file.
+        block_size (int): The size in bytes from which a block is handed to the writer thread.
+        flush_interval (float): The maximum time in seconds a record stays in memory, or None to only write full blocks.
+        records (int): Number of records written.
+        bytes_written (int): Number of bytes written, file header included.
+        error (Exception): The error that stopped the writing of the file, or None.
+    """
+    magic = CAPTURE_MAGIC
+
+    def __init__(self, file_path, block_size=1 << 20, flush_interval=1.0, max_pending=16):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.bytes_written = 0
+        self.error = None
+        self._file = open(file_path, "wb")
+        self._file.write(self.magic)
+        self.bytes_written += len(self.magic)
+        self._block = bytearray()
+        self._block_records = 0
+        self._lock = threading.Lock()
+        self._blocks = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, data, timestamp=None):
+        """
+        Appends a datagram to the capture.
+
+        :param data: The raw datagram (bytes or any buffer).
+        :param float timestamp: The receive time in seconds since epoch. Default is now.
+        """
+        if self.error is not None:
+            raise self.error
+        size = len(data)
+        packet_id = data[PACKET_ID_OFFSET] if size > PACKET_ID_OFFSET else 255
+        with self._lock:
+            self._block += RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, size, packet_id)
+            self._block += data
+            self.records += 1
+            self._block_records += 1
+            if len(self._block) >= self.block_size:
+                self._hand_over_block()
+
+    def _hand_over_block(self):
+        """
+        Queues the current block for the writer thread, waiting while max_pending blocks are queued.
+        Must be called with the lock held.
+        """
+        if self._block:
+            self._blocks.put((bytes(self._block), self._block_records))
+            self._block = bytearray()
+            self._block_records = 0
+
+    def _encode_block(self, block, records):
+        """
+        Returns the bytes written to the file for a block of records.
+
+        :param bytes block: The capture records of the block.
+        :param int records: The number of records in the block.
+        """
+        return block
+
+    def _write_loop(self):
+        """Writes the queued blocks to the file, and hands over the current block every flush_interval."""
+        while True:
+            try:
+                block = self._blocks.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._lock:
+                    self._hand_over_block()
+                continue
+            if block is None:
+                return
+            if self.error is not None:  # The file is not written anymore, the blocks are discarded until close
+                continue
+            try:
+                block = self._encode_block(*block)
+                self._file.write(block)
+                self._file.flush()
+                self.bytes_written += len(block)
+            except (OSError, ValueError) as e:  # Full disk, closed file...
+                self.error = e
+
+    def close(self):
+        """
+        Writes the remaining records, stops the writer thread and closes the file.
+        Raises the write error, if any, as the file is then incomplete.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._hand_over_block()
+            self._blocks.put(None)
+        self._thread.join()
+        try:
+            self._file.close()
+        except OSError as e:
+            if self.error is None:
+                self.error = e
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArchiveWriter(CaptureWriter):
+    """
+    Streams raw datagrams to a compressed archive file.
+    Records are grouped into blocks of about block_size bytes, each compressed independently
+    by the writer thread and preceded by a BLOCK_HEADER holding the session time and frame of its first record,
+    so readers can seek by decompressing only the blocks they need.
+    Attributes:
+        compression (str): ZLIB or LZMA.
+        level (int): The compression level (zlib) or preset (lzma), or None for the library default.
+    """
+    magic = ARCHIVE_MAGIC
+
+    def __init__(self, file_path, compression=ZLIB, block_size=2 << 20, flush_interval=None, level=None):
+        if compression not in COMPRESSION_CODES:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.level = level
+        super().__init__(file_path, block_size, flush_interval)
+
+    def _encode_block(self, block, records):
+        compressed = compress_block(block, self.compression, self.level)
+        return BLOCK_HEADER.pack(COMPRESSION_CODES[self.compression], len(compressed), len(block), records,
+                                 *first_record_fields(block)) + compressed
+
+
+def iter_records(buffer, offset=0):
+    """
+    Iterates over a sequence of capture records held in a buffer, stopping at a truncated last record.
+
+    :param buffer: The records (bytes, mmap...).
+    :param int offset: The offset of the first record in the buffer.
+    :return: A generator of (timestamp, packet_id, datagram offset, datagram size) tuples.
+    """
+    end = len(buffer)
+    while offset + RECORD_HEADER.size <= end:
+        timestamp, size, packet_id = RECORD_HEADER.unpack_from(buffer, offset)
+        data_offset = offset + RECORD_HEADER.size
+        if data_offset + size > end:
+            return
+        yield timestamp, packet_id, data_offset, size
+        offset = data_offset + size
+
+
+def read_archive(file_path):
+    """
+    Iterates over the records of an archive file, one block in memory at a time,
+    stopping at a truncated last block (e.g. after a crash).
+
+    :param str file_path: The path of the archive file.
+    :return: A generator of (timestamp, packet_id, datagram) tuples.
+    """
+    with open(file_path, "rb") as file:
+        if file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{file_path} is not an archive file")
+        while True:
+            block_header = file.read(BLOCK_HEADER.size)
+            if len(block_header) < BLOCK_HEADER.size:
+                return
+            compression_code, compressed_size = BLOCK_HEADER.unpack(block_header)[:2]
+            compressed = file.read(compressed_size)
+            if len(compressed) < compressed_size:
+                return
+            block = decompress_block(compressed, compression_code)
+            for timestamp, packet_id, data_offset, size in iter_records(block):
+                yield timestamp, packet_id, block[data_offset:data_offset + size]
+
+
+def read_records(file_path):
+    """
+    Iterates over the records of a capture or archive file, detected from its magic bytes.
+
+    :param str file_path: The path of the capture or archive file.
+    :return: A generator of (timestamp, packet_id, datagram) tuples.
+    """
+    with open(file_path, "rb") as file:
+        magic = file.read(len(ARCHIVE_MAGIC))
+    return read_archive(file_path) if magic == ARCHIVE_MAGIC else read_capture(file_path)
+
+
+def compress_capture(capture_file, archive_file, compression=ZLIB, block_size=2 << 20, level=None):
+    """
+    Converts a capture file to a compressed archive file.
+
+    :param str capture_file: The path of the capture file.
+    :param str archive_file: The path of the archive file to write.
+    :param str compression: ZLIB or LZMA. Default is ZLIB.
+    :param int block_size: The size in bytes of the uncompressed blocks. Default is 2 MB.
+    :param int level: The compression level (zlib) or preset (lzma). Default is None.
+    :return: The ArchiveWriter, with its records and bytes_written counters.
+    """
+    with ArchiveWriter(archive_file, compression, block_size, level=level) as archive_writer:
+        for timestamp, _, data in read_capture(capture_file):
+            archive_writer.write(data, timestamp)
+    return archive_writer
+
+
+def read_capture(file_path):
+    """
+    Iterates over the records of a capture file, stopping at a truncated last record (e.g. after a crash).
+
+    :param str file_path: The path of the capture file.
+    :return: A generator of (timestamp, packet_id, datagram) tuples.
+    """
+    with open(file_path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{file_path} is not a capture file")
+        while True:
+            record_header = file.read(RECORD_HEADER.size)
+            if len(record_header) < RECORD_HEADER.size:
+                return
+            timestamp, size, packet_id = RECORD_HEADER.unpack(record_header)
+            data = file.read(size)
+            if len(data) < size:
+                return
+            yield timestamp, packet_id, data
+
+
+def capture_file_path(directory, name):
+    """
+    Returns the path of a capture file in a directory.
+
+    :param str directory: The directory of the capture.
+    :param str name: The name of the capture, without extension.
+    """
+    return os.path.join(directory, name + CAPTURE_EXTENSION)
+
+
+def build_index(buffer, offset=None):
+    """
+    Scans the records of a capture held in a buffer (e.g. an mmap) and builds its index.
+    The header fields of each datagram are read in place, without copying the datagram.
+
+    :param buffer: The content of the capture file, or a decompressed archive block.
+    :param int offset: The offset of the first record. Default is None (after the capture file header, which is checked).
+    :return: A numpy array of INDEX_DTYPE with one row per complete record.
+    """
+    if offset is None:
+        if bytes(buffer[:len(CAPTURE_MAGIC)]) != CAPTURE_MAGIC:
+            raise ValueError("Not a capture file")
+        offset = len(CAPTURE_MAGIC)
+    rows = []
+    header_size = ctypes.sizeof(PacketHeader)
+    for timestamp, packet_id, data_offset, size in iter_records(buffer, offset):
+        if size >= header_size:
+            session_uid, session_time, frame_identifier = HEADER_FIELDS.unpack_from(buffer, data_offset + HEADER_FIELDS_OFFSET)
+        else:
+            session_uid, session_time, frame_identifier = 0, 0.0, 0
+        rows.append((data_offset, size, packet_id, timestamp, session_uid, session_time, frame_identifier))
+    return np.array(rows, dtype=INDEX_DTYPE)
+
+
+class CaptureReader:
+    """
+    Reads a capture file through a memory mapping, with a sidecar index of its records.
+    The index (offset, packet id, session UID, session time, frame identifier...) is stored as a NumPy array
+    next to the capture and rebuilt when the capture has grown since it was saved.
+    Packets are the ctypes classes of packet_parser overlaid on the mapping with ``from_buffer``, without copy:
+    they stay valid while the reader is open (use ``detach`` to keep one after closing it).
+    Attributes:
+        file_path (str): The path of the capture file.
+        index_path (str): The path of the sidecar index.
+        index (numpy.ndarray): One INDEX_DTYPE row per record.
+        session_runs (dict): The (start, stop) positions of the contiguous runs of records of each session UID,
+            in order of appearance.
+    """
+    def __init__(self, file_path, rebuild_index=False):
+        self.file_path = file_path
+        self.index_path = file_path + INDEX_EXTENSION
+        self._file = open(file_path, "rb")
+        file_size = os.fstat(self._file.fileno()).st_size
+        # A private copy-on-write mapping is writable, as required by ctypes from_buffer, without touching the file
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.index = None if rebuild_index else self._load_index(file_size)
+        if self.index is None:
+            self.index = build_index(self._mmap)
+            np.savez(self.index_path, index=self.index, capture_size=np.array(file_size))
+        self.session_runs = self._session_runs()
+
+    def _session_runs(self):
+        """Computes the contiguous runs of records of each session UID, once, so seeking does not scan the index."""
+        session_uids = self.index["session_uid"]
+        session_runs = {}
+        if len(session_uids) == 0:
+            return session_runs
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(session_uids)) + 1))
+        stops = np.append(starts[1:], len(session_uids))
+        for start, stop, session_uid in zip(starts.tolist(), stops.tolist(), session_uids[starts].tolist()):
+            session_runs.setdefault(session_uid, []).append((start, stop))
+        return session_runs
+
+    def _load_index(self, file_size):
+        """Loads the sidecar index if it exists and was built for the current capture size."""
+        if not os.path.exists(self.index_path):
+            return None
+        with np.load(self.index_path) as saved:
+            if int(saved["capture_size"]) != file_size:
+                return None
+            return saved["index"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def datagram(self, position):
+        """
+        Returns the raw datagram of a record as a memoryview over the mapping.
+
+        :param int position: The position of the record in the index.
+        """
+        row = self.index[position]
+        offset = int(row["offset"])
+        return memoryview(self._mmap)[offset:offset + int(row["size"])]
+
+    def packet(self, position):
+        """
+        Returns the header and packet of a record, overlaid on the mapping.
+
+        :param int position: The position of the record in the index.
+        :return: A tuple (header, packet), or None if the record is not a known, complete packet.
+        """
+        row = self.index[position]
+        packet_class = packet_header_to_class_map.get(int(row["packet_id"]))
+        if packet_class is None or int(row["size"]) < packet_class.size():
+            return None
+        offset = int(row["offset"])
+        return PacketHeader.from_buffer(self._mmap, offset), packet_class.from_buffer(self._mmap, offset)
+
+    def packets(self, start=0, stop=None, packet_ids=None):
+        """
+        Iterates over the packets of a range of records.
+
+        :param int start: The position of the first record. Default is 0.
+        :param int stop: The position after the last record. Default is None (until the end).
+        :param packet_ids: The packet ids to yield. Default is None (every packet).
+        :return: A generator of (header, packet) tuples.
+        """
+        positions = np.arange(start, len(self.index) if stop is None else stop)
+        if packet_ids is not None:
+            positions = positions[np.isin(self.index["packet_id"][positions], list(packet_ids))]
+        for position in positions:
+            packet_data = self.packet(position)
+            if packet_data is not None:
+                yield packet_data
+
+    def seek(self, session_time, session_uid=None):
+        """
+        Returns the position of the first record at or after a session time, with a binary search
+        on the runs of records of the session. Session times are assumed to increase within a session.
+
+        :param float session_time: The session time in seconds.
+        :param int session_uid: The session to search in. Default is None (the first session of the capture).
+        :return: The position of the record in the index (len(self) if there is none).
+        """
+        if len(self.index) == 0:
+            return 0
+        if session_uid is None:
+            session_uid = self.index["session_uid"][0]
+        session_times = self.index["session_time"]
+        for start, stop in self.session_runs.get(int(session_uid), ()):
+            found = start + int(np.searchsorted(session_times[start:stop], session_time, side="left"))
+            if found < stop:
+                return found
+        return len(self.index)
+
+    def sessions(self):
+        """Returns the session UIDs of the capture, in order of appearance."""
+        return list(self.session_runs)
+
+    def blocks(self, session_time=None, session_uid=None):
+        """
+        Iterates over the records as (index, buffer) blocks, the interface shared with ArchiveReader.
+        A capture is a single block: the index rows from the seek position, and the mapping.
+
+        :param float session_time: The session time to start from. Default is None (the first record).
+        :param int session_uid: The session to start in. Default is None (the first session of the capture).
+        :return: A generator of (index, buffer) tuples, the index offsets being offsets in the buffer.
+        """
+        start = 0 if session_time is None else self.seek(session_time, session_uid)
+        yield self.index[start:], self._mmap
+
+    def close(self):
+        """Closes the mapping and the file. Packets still referencing the mapping keep it alive."""
+        try:
+            self._mmap.close()
+        except BufferError:  # Packets overlaid on the mapping are still alive
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_block_index(file):
+    """
+    Builds the block index of an archive by reading its block headers, skipping over the compressed contents.
+
+    :param file: The archive file, opened in binary mode.
+    :return: A numpy array of BLOCK_INDEX_DTYPE with one row per complete block.
+    """
+    file.seek(0)
+    if file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+        raise ValueError("Not an archive file")
+    file_size = os.fstat(file.fileno()).st_size
+    rows = []
+    position = len(ARCHIVE_MAGIC)
+    first_record = 0
+    while position + BLOCK_HEADER.size <= file_size:
+        file.seek(position)
+        (compression_code, compressed_size, raw_size, records,
+         timestamp, session_uid, session_time, frame_identifier) = BLOCK_HEADER.unpack(file.read(BLOCK_HEADER.size))
+        offset = position + BLOCK_HEADER.size
+        if offset + compressed_size > file_size:
+            break
+        rows.append((offset, compressed_size, raw_size, compression_code, records, first_record,
+                     timestamp, session_uid, session_time, frame_identifier))
+        first_record += records
+        position = offset + compressed_size
+    return np.array(rows, dtype=BLOCK_INDEX_DTYPE)
+
+
+class ArchiveReader:
+    """
+    Reads a compressed archive file block by block.
+    The block index comes from the block headers, so opening an archive decompresses nothing,
+    and seeking to a session time decompresses only the blocks that are read from there.
+    The last decompressed block is kept, so consecutive reads in a block decompress it once.
+    Attributes:
+        file_path (str): The path of the archive file.
+        block_index (numpy.ndarray): One BLOCK_INDEX_DTYPE row per block.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        self.block_index = build_block_index(self._file)
+        self._cached_block = (None, None)
+
+    def __len__(self):
+        """Returns the number of records of the archive."""
+        return int(self.block_index["records"].sum())
+
+    def read_block(self, block):
+        """
+        Returns the decompressed content of a block.
+
+        :param int block: The position of the block in the block index.
+        """
+        if self._cached_block[0] != block:
+            row = self.block_index[block]
+            self._file.seek(int(row["offset"]))
+            compressed = self._file.read(int(row["compressed_size"]))
+            self._cached_block = (block, decompress_block(compressed, int(row["compression"])))
+        return self._cached_block[1]
+
+    def block_records(self, block):
+        """
+        Returns a block's content and the index of its records.
+
+        :param int block: The position of the block in the block index.
+        :return: A tuple (index, content), the INDEX_DTYPE offsets being offsets in the content.
+        """
+        content = self.read_block(block)
+        return build_index(content, 0), content
+
+    def seek_block(self, session_time, session_uid=None):
+        """
+        Returns the block holding the first record at or after a session time, from the block index only.
+        Session times are assumed to increase within a session, and the session must start at least one block.
+
+        :param float session_time: The session time in seconds.
+        :param int session_uid: The session to search in. Default is None (the session of the first block).
+        :return: The position of the block (len(self.block_index) if there is none).
+        """
+        if len(self.block_index) == 0:
+            return 0
+        if session_uid is None:
+            session_uid = self.block_index["session_uid"][0]
+        blocks = np.flatnonzero(self.block_index["session_uid"] == session_uid)
+        if len(blocks) == 0:
+            return len(self.block_index)
+        # The last block starting at or before the session time may hold it; before the first block
+        # of the session, the session may start inside the previous block
+        found = np.searchsorted(self.block_index["session_time"][blocks], session_time, side="right") - 1
+        if found < 0:
+            return max(int(blocks[0]) - 1, 0)
+        return int(blocks[found])
+
+    def blocks(self, session_time=None, session_uid=None):
+        """
+        Iterates over the records as (index, buffer) blocks, decompressing one block at a time.
+
+        :param float session_time: The session time to start from. Default is None (the first record).
+        :param int session_uid: The session to start in. Default is None (the session of the first block).
+        :return: A generator of (index, buffer) tuples, the index offsets being offsets in the buffer.
+        """
+        start = 0
+        if session_time is not None:
+            if session_uid is None and len(self.block_index):
+                session_uid = self.block_index["session_uid"][0]
+            start = self.seek_block(session_time, session_uid)
+        for block in range(start, len(self.block_index)):
+            index, content = self.block_records(block)
+            if block == start and session_time is not None:
+                after = (index["session_uid"] == session_uid) & (index["session_time"] >= session_time)
+                index = index[np.argmax(after):] if after.any() else index[:0]
+            yield index, content
+
+    def close(self):
+        """Closes the file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_reader(file_path):
+    """
+    Opens a CaptureReader or an ArchiveReader, depending on the magic bytes of the file.
+
+    :param str file_path: The path of the capture or archive file.
+    """
+    with open(file_path, "rb") as file:
+        magic = file.read(len(ARCHIVE_MAGIC))
+    return ArchiveReader(file_path) if magic == ARCHIVE_MAGIC else CaptureReader(file_path)
@@ -0,0 +1,320 @@
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+# NumPy dtypes of the struct format codes produced by helpers.packets.packet_codec
+STRUCT_CODE_TO_DTYPE = {
+    "b": "i1", "B": "u1", "h": "<i2", "H": "<u2", "i": "<i4", "I": "<u4",
+    "q": "<i8", "Q": "<u8", "f": "<f4", "d": "<f8", "?": "?", "c": "S1",
+}
+CHUNK_ROWS = 4096
+CHUNK_EXTENSION = ".npy"
+
+
+def schema_dtype(schema):
+    """
+    Returns the NumPy structured dtype of a RecordSchema, one typed field per column.
+    Text and union columns ("<n>s" codes) are stored as fixed-size bytes.
+
+    :param RecordSchema schema: The schema of the records.
+    """
+    return np.dtype([(column, f"S{code[:-1]}" if code.endswith("s") else STRUCT_CODE_TO_DTYPE[code])
+                     for column, code in zip(schema.columns, schema.codes)])
+
+
+class ColumnBuffer:
+    """
+    Typed column storage for records sharing one RecordSchema.
+    Decoded tuples are appended as they come, and every chunk_rows records are packed
+    into a NumPy structured array, so the buffer holds typed columns instead of Python objects.
+    Attributes:
+        schema (RecordSchema): The columns and struct format codes of the records.
+        dtype (numpy.dtype): The structured dtype the records are packed into.
+        chunk_rows (int): The number of records packed at once.
+    """
+    def __init__(self, schema, chunk_rows=CHUNK_ROWS):
+        self.schema = schema
+        self.dtype = schema_dtype(schema)
+        self.chunk_rows = chunk_rows
+        self._chunks = []
+        self._pending = []
+        self._packed_rows = 0
+
+    def append(self, values):
+        """
+        Appends a record.
+
+        :param tuple values: The values of the record, ordered like the schema columns.
+        :return: True if the pending records were packed into a new chunk.
+        """
+        self._pending.append(values)
+        if len(self._pending) >= self.chunk_rows:
+            return self.pack()
+        return False
+
+    def pack(self):
+        """
+        Packs the pending records into a typed chunk.
+
+        :return: True if a chunk was packed, False if no record was pending.
+        """
+        if not self._pending:
+            return False
+        self._chunks.append(np.array(self._pending, dtype=self.dtype))
+        self._packed_rows += len(self._pending)
+        self._pending = []
+        return True
+
+    def __len__(self):
+        return self._packed_rows + len(self._pending)
+
+    @property
+    def nbytes(self):
+        """The size in bytes of the packed chunks held in memory."""
+        return sum(chunk.nbytes for chunk in self._chunks)
+
+    def chunks(self):
+        """
+        Packs the pending records and returns the chunks held in memory, without removing them.
+
+        :return: The list of structured arrays, oldest first.
+        """
+        self.pack()
+        return list(self._chunks)
+
+    def take_chunks(self):
+        """
+        Packs the pending records and removes every chunk from the buffer.
+
+        :return: The list of structured arrays, oldest first.
+        """
+        self.pack()
+        chunks, self._chunks = self._chunks, []
+        self._packed_rows = 0
+        return chunks
+
+    def to_array(self):
+        """Returns every record as a single NumPy structured array."""
+        self.pack()
+        if not self._chunks:
+            return np.zeros(0, dtype=self.dtype)
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0]
+
+    def to_dataframe(self):
+        """Returns every record as a DataFrame with one typed column per schema column."""
+        return pd.DataFrame(self.to_array(), columns=list(self.schema.columns))
+
+
+class ChunkSpiller:
+    """
+    Writes spilled chunks to disk from a background thread, so the recording never waits on the disk.
+    The queue of chunks waiting to be written is bounded: when the disk cannot keep up,
+    spilling blocks instead of letting memory grow.
+    A failed write (full disk...) does not stop the thread: the error is kept and raised by ``spill`` and ``wait``.
+    Attributes:
+        written (int): Number of chunk files written.
+        error (Exception): The first error raised while writing a chunk file, or None.
+        thread (threading.Thread): The writer thread.
+    """
+    def __init__(self, max_pending=4):
+        self.written = 0
+        self.error = None
+        self._chunks = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._write_loop, name="chunk-spiller", daemon=True)
+        self.thread.start()
+
+    def spill(self, file_path, array):
+        """
+        Queues a chunk to be written as a .npy file.
+
+        :param str file_path: The path of the chunk file.
+        :param numpy.ndarray array: The structured array of the chunk.
+        """
+        self._raise_error()
+        self._chunks.put((file_path, array))
+
+    def _raise_error(self):
+        """Raises the error of a failed chunk write, if any."""
+        if self.error is not None:
+            raise self.error
+
+    def _write_loop(self):
+        """Writes the queued chunks until the spiller is closed."""
+        while True:
+            item = self._chunks.get()
+            try:
+                if item is None:
+                    return
+                file_path, array = item
+                os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                np.save(file_path, array)
+                self.written += 1
+            except Exception as e:  # Kept for spill and wait, so the thread keeps consuming the queue
+                if self.error is None:
+                    self.error = e
+            finally:
+                self._chunks.task_done()
+
+    def wait(self):
+        """Waits until every queued chunk is written, raising the error of a failed write, if any."""
+        self._chunks.join()
+        self._raise_error()
+
+    def close(self):
+        """Writes the queued chunks and stops the writer thread."""
+        self._chunks.put(None)
+        self.thread.join()
+
+
+class StreamBuffer:
+    """
+    The records of one recorded stream (motion, lap...), stored in one ColumnBuffer per schema.
+    A stream usually has a single schema; a second one appears e.g. when the player car index becomes 255
+    while recording only the player car. The pending records are packed whenever the schema changes,
+    and the order of the chunks across buffers is kept, so the records are read back in recording order.
+    With a memory budget, the packed chunks are spilled to numbered chunk files through a ChunkSpiller
+    whenever they exceed the budget, and read back in order when the stream is finalized,
+    so a stream of any length is recorded with constant memory.
+    Attributes:
+        name (str): The name of the stream, used in file names (e.g. "car_telemetry").
+        packet_id (int): The id of the packets of the stream.
+        buffers (list): The ColumnBuffer instances, in order of appearance.
+        memory_budget (int): The size in bytes of packed chunks kept in memory, or None for no limit.
+        spill_directory (str): The directory of the chunk files.
+        spiller (ChunkSpiller): The writer of the chunk files.
+        spilled_chunks (list): The (file path, ColumnBuffer) of the chunk files, in recording order.
+    """
+    def __init__(self, name, packet_id, memory_budget=None, spill_directory=None, spiller=None):
+        if memory_budget is not None and (spill_directory is None or spiller is None):
+            raise ValueError("A memory budget needs a spill directory and a spiller")
+        self.name = name
+        self.packet_id = packet_id
+        self.buffers = []
+        self.memory_budget = memory_budget
+        self.spill_directory = spill_directory
+        self.spiller = spiller
+        self.spilled_chunks = []
+        self._spilled_rows = 0
+        self._buffers_by_schema = {}
+        self._last_schema = None
+        self._last_buffer = None
+        self._chunk_order = []  # The buffer of each chunk held in memory, in recording order
+
+    def append(self, schema, values):
+        """
+        Appends a decoded record to the buffer of its schema.
+
+        :param RecordSchema schema: The schema of the record, as returned by the codec.
+        :param tuple values: The values of the record.
+        """
+        if schema is not self._last_schema:
+            # Schemas are cached by the codecs, so the identity of the last one is checked before hashing
+            if self._last_buffer is not None and self._last_buffer.pack():
+                self._chunk_order.append(self._last_buffer)
+            buffer = self._buffers_by_schema.get(schema)
+            if buffer is None:
+                buffer = self._buffers_by_schema[schema] = ColumnBuffer(schema)
+                self.buffers.append(buffer)
+            self._last_schema, self._last_buffer = schema, buffer
+        if self._last_buffer.append(values):
+            self._chunk_order.append(self._last_buffer)
+            if self.memory_budget is not None and sum(buffer.nbytes for buffer in self.buffers) >= self.memory_budget:
+                self.spill()
+
+    def _memory_chunks(self):
+        """Returns the (chunk, ColumnBuffer) pairs held in memory, in recording order, pending records packed."""
+        if self._last_buffer is not None and self._last_buffer.pack():
+            self._chunk_order.append(self._last_buffer)
+        chunks = {id(buffer): iter(buffer.chunks()) for buffer in self.buffers}
+        return [(next(chunks[id(buffer)]), buffer) for buffer in self._chunk_order]
+
+    def spill(self):
+        """Hands the records held in memory to the spiller, as numbered chunk files in recording order."""
+        memory_chunks = self._memory_chunks()
+        for buffer in self.buffers:
+            buffer.take_chunks()
+        self._chunk_order = []
+        for chunk, buffer in memory_chunks:
+            file_path = os.path.join(self.spill_directory,
+                                     f"{self.name}_chunk_{len(self.spilled_chunks):05d}{CHUNK_EXTENSION}")
+            self.spiller.spill(file_path, chunk)
+            self.spilled_chunks.append((file_path, buffer))
+            self._spilled_rows += len(chunk)
+
+    def __len__(self):
+        return self._spilled_rows + sum(len(buffer) for buffer in self.buffers)
+
+    @property
+    def columns(self):
+        """The columns of the stream's DataFrame, known from the schemas without building it."""
+        columns = {}
+        for buffer in self.buffers:
+            columns.update(dict.fromkeys(buffer.schema.columns))
+        return list(columns) + ["m_packetId", "unique_key"]
+
+    def _finish_frame(self, array, buffer):
+        """Builds the DataFrame of a chunk, with the m_packetId and unique_key columns added."""
+        df = pd.DataFrame(array, columns=list(buffer.schema.columns))
+        df["m_packetId"] = self.packet_id
+        return add_unique_key(df)
+
+    def dataframes(self):
+        """
+        Iterates over the records of the stream as DataFrames, one per chunk:
+        the spilled chunk files first, in order, then the records held in memory.
+        Only one spilled chunk is loaded at a time.
+
+        :return: A generator of DataFrames with the m_packetId and unique_key columns.
+        """
+        if self.spilled_chunks:
+            self.spiller.wait()
+        for file_path, buffer in self.spilled_chunks:
+            yield self._finish_frame(np.load(file_path), buffer)
+        for chunk, buffer in self._memory_chunks():
+            yield self._finish_frame(chunk, buffer)
+
+    def to_dataframe(self):
+        """
+        Returns the records of the stream as a single DataFrame, spilled chunks included.
+        Records of different schemas are concatenated, missing columns being left empty.
+        """
+        frames = list(self.dataframes())
+        if not frames:
+            return pd.DataFrame()
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True, sort=False)
+
+    def clear(self):
+        """Removes every record of the stream, spilled chunk files included, e.g. when a new session starts."""
+        self.remove_spilled_chunks()
+        self.buffers = []
+        self._buffers_by_schema = {}
+        self._last_schema = None
+        self._last_buffer = None
+        self._chunk_order = []
+
+    def remove_spilled_chunks(self):
+        """Deletes the chunk files of the stream, once they have been merged into its outputs."""
+        if self.spilled_chunks:
+            self.spiller.wait()
+        for file_path, _ in self.spilled_chunks:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        self.spilled_chunks = []
+        self._spilled_rows = 0
+
+
+def add_unique_key(df):
+    """
+    Adds a unique key column composed of m_sessionTime and m_frameIdentifier of the header.
+    This key will help during the join/merge process later.
+
+    :param df: The DataFrame of a stream.
+    :return: The DataFrame with the unique_key column.
+    """
+    df["unique_key"] = (df["m_header_m_sessionTime"].astype(str) + "_"
+                        + df["m_header_m_frameIdentifier"].astype(str))
+    return df
@@ -0,0 +1,128 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Append-only master dataset:
+#   <dataset directory>/manifest.json          : the committed partitions
+#   <dataset directory>/<circuit>/<session>.csv : one partition per recorded session
+DATASET_DIRECTORY = "./data/dataset"
+MANIFEST_FILE = "manifest.json"
+PARTITION_EXTENSION = ".csv"
+
+
+def _atomic_write(file_path, write):
+    """
+    Writes a file through a temporary file in the same directory, renamed over the target once complete,
+    so an interrupted write never leaves a truncated file behind.
+
+    :param str file_path: The path of the file to write.
+    :param write: A function called with the path of the temporary file to write to.
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    os.close(file_descriptor)
+    try:
+        write(temporary_path)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def read_manifest(dataset_directory=DATASET_DIRECTORY):
+    """
+    Returns the committed partitions of a dataset.
+
+    :param str dataset_directory: The directory of the dataset. Default is DATASET_DIRECTORY.
+    :return: A list of partition entries (circuit, session, path relative to the dataset directory, rows, committed_at).
+        rows is None when it was not known at commit time.
+    """
+    manifest_path = os.path.join(dataset_directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, "r") as file:
+        return json.load(file)["partitions"]
+
+
+def commit_partition(data, circuit, session, dataset_directory=DATASET_DIRECTORY, rows=None):
+    """
+    Adds the data of one session to the dataset, without reading or rewriting the other partitions.
+    The partition file is written first and the manifest is then replaced atomically,
+    so a partition is visible to readers only once it is complete.
+    Committing a session again replaces its partition.
+
+    :param data: The DataFrame of the session, or the path of its CSV file (copied without being parsed).
+    :param str circuit: The circuit of the session (partition directory).
+    :param str session: The name of the session (partition file name), e.g. its timestamp.
+    :param str dataset_directory: The directory of the dataset. Default is DATASET_DIRECTORY.
+    :param int rows: The number of rows of a CSV file, if known. Ignored for a DataFrame.
+    :return: The path of the partition file.
+    """
+    relative_path = os.path.join(circuit, session + PARTITION_EXTENSION)
+    partition_path = os.path.join(dataset_directory, relative_path)
+    if isinstance(data, pd.DataFrame):
+        rows = len(data)
+        _atomic_write(partition_path, lambda path: data.to_csv(path, index=False))
+    else:
+        _atomic_write(partition_path, lambda path: shutil.copyfile(data, path))
+
+    partitions = [partition for partition in read_manifest(dataset_directory)
+                  if (partition["circuit"], partition["session"]) != (circuit, session)]
+    partitions.append({
+        "circuit": circuit,
+        "session": session,
+        "path": relative_path,
+        "rows": rows,
+        "committed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    })
+
+    def write_manifest(path):
+        with open(path, "w") as file:
+            json.dump({"partitions": partitions}, file, indent=2)
+
+    _atomic_write(os.path.join(dataset_directory, MANIFEST_FILE), write_manifest)
+    return partition_path
+
+
+def select_partitions(dataset_directory=DATASET_DIRECTORY, circuits=None, sessions=None):
+    """
+    Returns the committed partitions matching the requested circuits and sessions.
+
+    :param str dataset_directory: The directory of the dataset. Default is DATASET_DIRECTORY.
+    :param circuits: The circuits to select. Default is None (every circuit).
+    :param sessions: The sessions to select. Default is None (every session).
+    """
+    return [partition for partition in read_manifest(dataset_directory)
+            if (circuits is None or partition["circuit"] in circuits)
+            and (sessions is None or partition["session"] in sessions)]
+
+
+def load_dataset(dataset_directory=DATASET_DIRECTORY, circuits=None, sessions=None, columns=None):
+    """
+    Loads the requested partitions of the dataset; the other partitions are not read.
+
+    :param str dataset_directory: The directory of the dataset. Default is DATASET_DIRECTORY.
+    :param circuits: The circuits to load. Default is None (every circuit).
+    :param sessions: The sessions to load. Default is None (every session).
+    :param columns: The columns to load. Default is None (every column).
+    :return: A DataFrame with a circuit and a session column, empty if no partition matches.
+    """
+    partitions = select_partitions(dataset_directory, circuits, sessions)
+    frames = [pd.read_csv(os.path.join(dataset_directory, partition["path"]),
+                          usecols=(lambda column: column in columns) if columns is not None else None)
+              for partition in partitions]
+    if not frames:
+        return pd.DataFrame()
+    rows = [len(df) for df in frames]
+    # The partition columns are added once to the concatenated frame, as inserting them into each wide frame fragments it
+    partition_columns = pd.DataFrame({
+        "circuit": np.repeat([partition["circuit"] for partition in partitions], rows),
+        "session": np.repeat([partition["session"] for partition in partitions], rows),
+    })
+    return pd.concat([pd.concat(frames, ignore_index=True, sort=False), partition_columns], axis=1)
@@ -1,11 +1,18 @@
 import sys
 import os
 import ctypes
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
 
 # Add the parent directory to the path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from helpers.packets.packet_parser import PacketHeader, packet_header_to_class_map
+from helpers.packets.packet_parser import PACKET_ID_OFFSET, PacketHeader, packet_header_to_class_map
+from helpers.packets.packet_codec import get_codec
+from helpers.packets.packet_dtypes import flatten_records, header_dtype, packet_id_to_dtype_map
+from column_buffer import ColumnBuffer
 
 def ctypes_to_dict(ctypes_obj):
     """
@@ -28,77 +35,378 @@ def ctypes_to_dict(ctypes_obj):
     else:
         return ctypes_obj
 
-def find_next_header(data, start_offset, header_bytes=b'\xe8\x07\x18'):
+def ctypes_to_flat_dict(ctypes_obj):
+    """
+    Convert a ctypes packet to a flat dictionary using its compiled codec.
+    This gives the same keys and values as ``flatten_dict(ctypes_to_dict(ctypes_obj))``
+    with a single ``struct.unpack_from`` call instead of a recursive walk of the fields.
+    Unions (event details) are returned as their raw bytes.
+
+    :param ctypes_obj: A ctypes Structure (typically a packet from packet_parser).
+    """
+    return get_codec(type(ctypes_obj)).decode_dict(ctypes_obj)
+
+HEADER_BYTES = b'\xe8\x07\x18'  # Expected bytes for a valid header (m_packetFormat 2024, m_gameYear 24)
+DUMP_START_OFFSET = 16  # Offset of the first packet in a dump
+PACKET_PADDING = 3  # Bytes between two packets in a dump
+SEARCH_WINDOW = 1 << 20  # Bytes copied at a time when searching a header in a buffer without find()
+SCAN_WINDOW = 64 << 20  # Bytes scanned at a time by index_packets
+PARALLEL_CHUNK_BYTES = 32 << 20  # Bytes of packets decoded by each task of deserialize_file_parallel
+NUMBER_OF_CARS = 22
+WIDE_LAYOUT = "wide"  # One row per packet, one column per car and field
+LONG_LAYOUT = "long"  # One row per packet and car
+CAR_INDEX_COLUMN = "car_index"
+INVALID_CAR_INDEX = 255
+
+# Boundary index of a dump, one row per packet
+PACKET_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("packet_id", "u1"), ("size", "<u4")])
+
+# Size of each packet class by packet id, 0 for unknown packet ids
+packet_sizes = np.zeros(256, dtype=np.int64)
+for _packet_id, _packet_class in packet_header_to_class_map.items():
+    packet_sizes[_packet_id] = ctypes.sizeof(_packet_class)
+
+def find_next_header(data, start_offset, header_bytes=HEADER_BYTES):
     """
     Search for the next valid header in the data stream starting from a given offset.
     The function looks for the specified header bytes in the data and returns the offset where it is found.
     If no valid header is found, it raises a ValueError.
+    Buffers without a find method (memoryview) are searched window by window, so memory stays bounded.
 
-    :param data: The byte stream to search in.
+    :param data: The byte stream to search in (bytes, bytearray, mmap or memoryview).
     :param start_offset: The offset from which to start searching.
     :param header_bytes: The bytes that represent a valid header (research done shows that the following
      hexadecimal is the one used in EA F1 24 to identify a header: 0xe8 0x07 0x18).
     """
-    search_offset = data.find(header_bytes, start_offset)
+    if hasattr(data, "find"):
+        search_offset = data.find(header_bytes, start_offset)
+    else:
+        search_offset = -1
+        for window_start in range(start_offset, len(data), SEARCH_WINDOW):
+            window = bytes(data[window_start:window_start + SEARCH_WINDOW + len(header_bytes) - 1])
+            found = window.find(header_bytes)
+            if found != -1:
+                search_offset = window_start + found
+                break
     if search_offset == -1:
         raise ValueError("No valid header found in the remaining data")
     return search_offset
 
-# Function to deserialize multiple packets
-def deserialize_packets(data):
+def iter_packets(data, offset=DUMP_START_OFFSET, verbose=False, packet_ids=None, max_packets=None, copy=True):
     """
-    The function iterates over the data stream, parsing each packet and storing it in a list.
-    It validates the header for each packet, extracts the packet type, and uses the corresponding class
-    to parse the packet data. If a header is invalid or incomplete, it searches for the next valid header.
-    If a packet is incomplete, it stops parsing further packets.
+    Lazily iterates over the packets of a dump held in a buffer, without slicing it.
+    Each packet is read in place with ``from_buffer_copy(data, offset)`` (or ``from_buffer`` when copy is False),
+    so only the packets being used are in memory and a multi-gigabyte mmap is processed in constant memory.
+    It validates the header of each packet, searching for the next valid header when it is invalid,
+    and stops at the first incomplete packet. Stopping the iteration early stops the parsing.
 
-    :param data: The byte stream containing the packets to be deserialized.
+    :param data: The buffer containing the packets (bytes, bytearray, mmap or memoryview).
+    :param int offset: The offset of the first packet. Default is DUMP_START_OFFSET.
+    :param bool verbose: Whether to print each parsed header and each recovery. Default is False.
+    :param packet_ids: The packet ids to yield, the others are skipped without being decoded. Default is None (every packet).
+    :param int max_packets: The maximum number of packets to yield. Default is None (no limit).
+    :param bool copy: Whether to copy each packet out of the buffer. Packets read without copy share the buffer memory,
+        which must be writable and outlive them. Default is True.
+    :return: A generator of (offset, packet) tuples.
     """
-    offset = 16  # Start with an initial offset
-    packets = []  # Store parsed packets
-    HEADER_BYTES = b'\xe8\x07\x18'  # Expected bytes for a valid header
-
-    while offset < len(data):
+    header_size = ctypes.sizeof(PacketHeader)
+    read_packet = "from_buffer_copy" if copy else "from_buffer"
+    end = len(data)
+    count = 0
+    while offset < end and (max_packets is None or count < max_packets):
         # Step 1: Validate the header
-        if data[offset:offset + len(HEADER_BYTES)] != HEADER_BYTES:
-            print(f"Invalid header at offset {offset}. Searching for next valid header...")
+        if bytes(data[offset:offset + len(HEADER_BYTES)]) != HEADER_BYTES:
+            if verbose:
+                print(f"Invalid header at offset {offset}. Searching for next valid header...")
             try:
                 offset = find_next_header(data, offset)
             except ValueError:
-                print("No more valid headers found. Stopping parsing.")
-                break
+                if verbose:
+                    print("No more valid headers found. Stopping parsing.")
+                return
 
         # Step 2: Extract the packet header
-        if offset + ctypes.sizeof(PacketHeader) > len(data):
-            print(f"Incomplete PacketHeader at offset {offset}. Stopping parsing.")
-            break
+        if offset + header_size > end:
+            if verbose:
+                print(f"Incomplete PacketHeader at offset {offset}. Stopping parsing.")
+            return
 
-        header = PacketHeader.from_buffer_copy(data[offset:offset + ctypes.sizeof(PacketHeader)])
-        print(f"Parsed header at offset {offset}: {ctypes_to_dict(header)}")
+        packet_type = data[offset + PACKET_ID_OFFSET]
+        if verbose:
+            print(f"Parsed header at offset {offset}: {ctypes_to_dict(PacketHeader.from_buffer_copy(data, offset))}")
 
         # Step 3: Get the corresponding packet class
-        packet_type = header.m_packetId
-        if packet_type not in packet_header_to_class_map:
-            print(f"Unknown packet type {packet_type} at offset {offset}. Skipping...")
-            offset += 3 + ctypes.sizeof(PacketHeader)  # Skip this header and 3 bytes of padding
+        packet_class = packet_header_to_class_map.get(packet_type)
+        if packet_class is None:
+            if verbose:
+                print(f"Unknown packet type {packet_type} at offset {offset}. Skipping...")
+            offset += PACKET_PADDING + header_size  # Skip this header and 3 bytes of padding
             continue
 
-        packet_class = packet_header_to_class_map[packet_type]
         packet_size = ctypes.sizeof(packet_class)
 
         # Step 4: Validate and extract the packet
-        if offset + packet_size > len(data):
-            print(f"Incomplete packet at offset {offset}. Stopping parsing.")
-            break
+        if offset + packet_size > end:
+            if verbose:
+                print(f"Incomplete packet at offset {offset}. Stopping parsing.")
+            return
 
-        packet = packet_class.from_buffer_copy(data[offset:offset + packet_size])
-        parsed_packet = ctypes_to_dict(packet)
-        packets.append(parsed_packet)
+        if packet_ids is None or packet_type in packet_ids:
+            yield offset, getattr(packet_class, read_packet)(data, offset)
+            count += 1
 
         # Step 5: Adjust the offset (account for 3-byte padding)
-        offset += 3 + packet_size
+        offset += PACKET_PADDING + packet_size
+
+def iter_file_packets(file_path, **kwargs):
+    """
+    Lazily iterates over the packets of a dump file through a read-only memory mapping.
+    The file is never read as a whole; the mapping is closed when the iteration ends or is stopped.
+
+    :param str file_path: The path of the dump file.
+    :param kwargs: The options of ``iter_packets`` (offset, verbose, packet_ids, max_packets).
+    :return: A generator of (offset, packet) tuples, the packets being copies.
+    """
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield from iter_packets(data, copy=True, **kwargs)
+
+def _header_candidates(array, start, stop):
+    """
+    Returns the offsets in [start, stop) at which HEADER_BYTES appear, with vectorized comparisons.
+
+    :param numpy.ndarray array: The dump as a uint8 array.
+    :param int start: The first offset to test.
+    :param int stop: The offset after the last one to test.
+    """
+    last = min(stop, len(array) - len(HEADER_BYTES) + 1)
+    if last <= start:
+        return np.zeros(0, dtype=np.int64)
+    window = array[start:last + len(HEADER_BYTES) - 1]
+    match = (window[:-2] == HEADER_BYTES[0]) & (window[1:-1] == HEADER_BYTES[1]) & (window[2:] == HEADER_BYTES[2])
+    return np.flatnonzero(match) + start
+
+def _validate_headers(array, candidates):
+    """
+    Keeps the candidate offsets whose PacketHeader is plausible: a known packet id, a complete packet,
+    a valid player car index and a finite, non-negative session time.
+
+    :param numpy.ndarray array: The dump as a uint8 array.
+    :param numpy.ndarray candidates: The offsets where HEADER_BYTES were found.
+    :return: A tuple (offsets, packet_ids, sizes) of the valid headers.
+    """
+    header_size = header_dtype.itemsize
+    candidates = candidates[candidates + header_size <= len(array)]
+    headers = array[candidates[:, None] + np.arange(header_size)].view(header_dtype).reshape(-1)
+    packet_ids = headers["m_packetId"]
+    sizes = packet_sizes[packet_ids]
+    player_car = headers["m_playerCarIndex"]
+    session_time = headers["m_sessionTime"]
+    valid = ((sizes > 0) & (candidates + sizes <= len(array))
+             & ((player_car < NUMBER_OF_CARS) | (player_car == INVALID_CAR_INDEX))
+             & np.isfinite(session_time) & (session_time >= 0))
+    return candidates[valid], packet_ids[valid], sizes[valid]
+
+def index_packets(data, offset=DUMP_START_OFFSET):
+    """
+    Locates every packet of a dump in one vectorized pass, instead of validating the packets one by one
+    and searching the next header after each invalid one.
+    All the positions of HEADER_BYTES are found at once with NumPy, window by window, validated against
+    the PacketHeader fields and the packet sizes of packet_header_to_class_map, and a candidate lying
+    inside a previous packet (header bytes within packet data) is discarded.
+    The boundaries do not assume any padding between packets, so corrupted or truncated areas are skipped.
+
+    :param data: The buffer containing the packets (bytes, bytearray, mmap or memoryview).
+    :param int offset: The offset from which to scan. Default is DUMP_START_OFFSET.
+    :return: A numpy array of PACKET_INDEX_DTYPE (offset, packet_id, size), ordered by offset.
+    """
+    array = np.frombuffer(data, dtype=np.uint8)
+    offsets, packet_ids, sizes = [], [], []
+    for start in range(offset, len(array), SCAN_WINDOW):
+        window_offsets, window_packet_ids, window_sizes = _validate_headers(
+            array, _header_candidates(array, start, start + SCAN_WINDOW))
+        offsets.append(window_offsets)
+        packet_ids.append(window_packet_ids)
+        sizes.append(window_sizes)
+
+    index = np.zeros(sum(len(window_offsets) for window_offsets in offsets), dtype=PACKET_INDEX_DTYPE)
+    if len(index):
+        index["offset"] = np.concatenate(offsets)
+        index["packet_id"] = np.concatenate(packet_ids)
+        index["size"] = np.concatenate(sizes)
+
+    # Discard the candidates starting inside the previous accepted packet; without any, every candidate is kept
+    ends = index["offset"] + index["size"]
+    if len(index) > 1 and np.any(index["offset"][1:] < ends[:-1]):
+        keep = np.zeros(len(index), dtype=bool)
+        end = 0
+        for position, (packet_offset, packet_end) in enumerate(zip(index["offset"].tolist(), ends.tolist())):
+            if packet_offset >= end:
+                keep[position] = True
+                end = packet_end
+        index = index[keep]
+    return index
+
+def iter_indexed_packets(data, index, copy=True):
+    """
+    Iterates over the packets of a dump located by ``index_packets``.
 
-    return packets
+    :param data: The buffer containing the packets.
+    :param numpy.ndarray index: The rows of ``index_packets`` to read.
+    :param bool copy: Whether to copy each packet out of the buffer (see ``iter_packets``). Default is True.
+    :return: A generator of (offset, packet) tuples.
+    """
+    read_packet = "from_buffer_copy" if copy else "from_buffer"
+    for packet_offset, packet_id in zip(index["offset"].tolist(), index["packet_id"].tolist()):
+        yield packet_offset, getattr(packet_header_to_class_map[packet_id], read_packet)(data, packet_offset)
+
+# Function to deserialize multiple packets
+def deserialize_packets(data, verbose=False):
+    """
+    The function locates every packet of the data stream with ``index_packets`` and parses each one into a list.
+    Headers are validated and corrupted areas skipped in a single vectorized pass.
+    Prefer ``iter_packets`` or ``iter_file_packets`` for large dumps, which do not build the whole list.
+
+    :param data: The byte stream containing the packets to be deserialized.
+    :param bool verbose: Whether to print the number of packets found and the corrupted areas skipped. Default is False.
+    """
+    index = index_packets(data)
+    if verbose:
+        expected_offsets = index["offset"][:-1] + index["size"][:-1] + PACKET_PADDING
+        skipped = np.flatnonzero(index["offset"][1:] != expected_offsets)
+        print(f"Found {len(index)} packets, resynchronised after {len(skipped)} corrupted areas "
+              f"at offsets {index['offset'][skipped + 1].tolist()}")
+    return [ctypes_to_dict(packet) for _, packet in iter_indexed_packets(data, index)]
+
+def split_index(index, chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """
+    Splits a packet index into consecutive chunks of about chunk_bytes of dump each.
+    Chunks always start at a validated packet boundary, so no packet is shared by two chunks.
+
+    :param numpy.ndarray index: The index returned by ``index_packets``.
+    :param int chunk_bytes: The approximate size in bytes of each chunk. Default is PARALLEL_CHUNK_BYTES.
+    :return: A list of index slices, in dump order.
+    """
+    if len(index) == 0:
+        return []
+    first_offset = int(index["offset"][0])
+    boundaries = np.arange(first_offset, int(index["offset"][-1]) + 1, chunk_bytes, dtype=np.uint64)
+    starts = np.unique(np.searchsorted(index["offset"], boundaries))
+    return np.split(index, starts[1:])
+
+def decode_chunk(file_path, index):
+    """
+    Decodes the packets of one chunk of a dump file to typed columns, one table per packet id.
+    The file is read through a read-only memory mapping, so only the index of the chunk is sent to the worker process.
+
+    :param str file_path: The path of the dump file.
+    :param numpy.ndarray index: The rows of ``index_packets`` belonging to the chunk.
+    :return: A dict mapping each packet id to a tuple (columns, structured array).
+    """
+    buffers = {}
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for packet_offset, packet_id in zip(index["offset"].tolist(), index["packet_id"].tolist()):
+            schema, values = get_codec(packet_header_to_class_map[packet_id]).decode_record(data, packet_offset)
+            buffer = buffers.get(packet_id)
+            if buffer is None:
+                buffer = buffers[packet_id] = ColumnBuffer(schema)
+            buffer.append(values)
+    return {packet_id: (list(buffer.schema.columns), buffer.to_array()) for packet_id, buffer in buffers.items()}
+
+def deserialize_file_parallel(file_path, workers=None, chunk_bytes=PARALLEL_CHUNK_BYTES):
+    """
+    Decodes a dump file into one DataFrame per packet id using a pool of processes.
+    The packet boundaries are found once with ``index_packets``, the dump is split into chunks at those boundaries,
+    and each chunk is decoded by ``decode_chunk`` in a worker process which maps the file itself.
+    The typed tables of the chunks are merged in dump order, so the result does not depend on the number of workers.
+
+    :param str file_path: The path of the dump file.
+    :param int workers: The number of worker processes. Default is None (the number of CPUs).
+    :param int chunk_bytes: The approximate size in bytes of the dump decoded by each task. Default is PARALLEL_CHUNK_BYTES.
+    :return: A dict mapping each packet id to a DataFrame of its packets, with flattened column names.
+    """
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        index = index_packets(data)
+    chunks = split_index(index, chunk_bytes)
+
+    tables = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map returns the results in submission order, i.e. in dump order
+        for chunk_tables in executor.map(decode_chunk, [file_path] * len(chunks), chunks):
+            for packet_id, (columns, array) in chunk_tables.items():
+                tables.setdefault(packet_id, (columns, []))[1].append(array)
+    return {packet_id: pd.DataFrame(np.concatenate(arrays), columns=columns)
+            for packet_id, (columns, arrays) in sorted(tables.items())}
+
+def gather_packets(data, offsets, packet_id):
+    """
+    Copies the packets of one type into a contiguous buffer in a single NumPy gather,
+    reinterpreted with the structured dtype mirroring the packet_parser class.
+
+    :param data: The buffer containing the packets (bytes, bytearray, mmap or memoryview).
+    :param numpy.ndarray offsets: The offsets of the packets, all of type packet_id.
+    :param int packet_id: The id of the packets.
+    :return: A 1-d structured array of packet_id_to_dtype_map[packet_id], one record per packet.
+    """
+    dtype = packet_id_to_dtype_map[packet_id]
+    array = np.frombuffer(data, dtype=np.uint8)
+    # A view of every packet-sized window of the buffer, so the gather needs one index per packet, not per byte
+    windows = np.lib.stride_tricks.sliding_window_view(array, dtype.itemsize)
+    return windows[np.asarray(offsets, dtype=np.int64)].view(dtype).reshape(-1)
+
+def _cars_field(dtype):
+    """Returns the name of the per-car array field of a packet dtype, or None if it has none."""
+    for name in dtype.names:
+        field_dtype = dtype.fields[name][0]
+        if field_dtype.shape == (NUMBER_OF_CARS,) and field_dtype.base.names is not None:
+            return name
+    return None
+
+def records_to_dataframe(records, layout=WIDE_LAYOUT):
+    """
+    Builds the DataFrame of packets viewed as a structured array.
+    The wide layout has the same columns as ``flatten_dict(ctypes_to_dict(packet))``.
+    The long layout has one row per car, the fields of the per-car array without their
+    ``<field>_<car>_`` prefix, a car_index column, and the other fields of the packet repeated on each row.
+
+    :param numpy.ndarray records: The packets, as returned by ``gather_packets``.
+    :param str layout: WIDE_LAYOUT or LONG_LAYOUT. Default is WIDE_LAYOUT.
+    :return: A pandas DataFrame.
+    """
+    if layout == WIDE_LAYOUT:
+        return pd.DataFrame(flatten_records(records))
+    cars_field = _cars_field(records.dtype)
+    if cars_field is None:
+        raise ValueError(f"Packets of dtype {records.dtype.names} have no per-car array for the long layout")
+    columns = {}
+    for name in records.dtype.names:
+        if name != cars_field:
+            flatten_records(records[name], name, columns)
+    columns = {column: np.repeat(values, NUMBER_OF_CARS) for column, values in columns.items()}
+    columns[CAR_INDEX_COLUMN] = np.tile(np.arange(NUMBER_OF_CARS, dtype=np.uint8), len(records))
+    return pd.DataFrame(flatten_records(records[cars_field].reshape(-1), columns=columns))
+
+def decode_dataframes(data, packet_ids=None, layout=WIDE_LAYOUT, index=None):
+    """
+    Decodes a dump directly into one DataFrame per packet id, without creating a Python object per packet:
+    the packets of each type are gathered with ``gather_packets`` and their columns built by ``records_to_dataframe``.
+
+    :param data: The buffer containing the packets (bytes, bytearray, mmap or memoryview).
+    :param packet_ids: The packet ids to decode. Default is None (every packet id found).
+    :param str layout: WIDE_LAYOUT or LONG_LAYOUT. With the long layout, packets without a per-car array
+        are decoded with the wide layout. Default is WIDE_LAYOUT.
+    :param numpy.ndarray index: The index of the dump, if already computed. Default is None (``index_packets(data)``).
+    :return: A dict mapping each packet id to its DataFrame, packets in dump order.
+    """
+    if index is None:
+        index = index_packets(data)
+    if packet_ids is None:
+        packet_ids = np.unique(index["packet_id"]).tolist()
+    dataframes = {}
+    for packet_id in packet_ids:
+        records = gather_packets(data, index["offset"][index["packet_id"] == packet_id], packet_id)
+        packet_layout = layout if _cars_field(records.dtype) is not None else WIDE_LAYOUT
+        dataframes[packet_id] = records_to_dataframe(records, packet_layout)
+    return dataframes
 
 def flatten_dict(source_dict, parent_key="", sep="_"):
     """
@@ -1,29 +1,66 @@
+import asyncio
 import socket
 import threading
 import os
+import re
+import struct
 import datetime
-import pandas as pd
-import glob
 
-from deserializer import ctypes_to_dict, flatten_dict
-from helpers.packets.packet_parser import PacketHeader, packet_header_to_class_map
+from capture import ARCHIVE_EXTENSION, ZLIB, CaptureWriter, compress_capture, read_records, capture_file_path
+from column_buffer import ChunkSpiller, StreamBuffer
+from dataset import DATASET_DIRECTORY, commit_partition
+from helpers.packets.packet_parser import PACKET_ID_OFFSET, PacketHeader, PacketSessionData
+from helpers.packets.packet_codec import PLAYER_CAR, build_car_slice_codecs, packet_id_to_codec_map
 from models.packet_type import PacketType
+from network.async_listener import AsyncListener
+from network.duplicate_filter import DuplicateFilter
+from utils.dictionnaries import session_types, track_ids
 
 # Use the port where the data is being received
-CIRCUIT = "monza"
 PORT = 20776
 EXECUTION_COMMAND = "run"
 CURRENT_TIMESTAMP = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-DATA_DIRECTORY = f"./data/raw/{CIRCUIT}/" + CURRENT_TIMESTAMP
-BUFFER_SIZE = 2048
-
-# Lists to store packets for each stream
-motion_packets = []
-session_packets = []
-lap_packets = []
-car_setup_packets = []
-car_telemetry_packets = []
-time_trial_packets = []
+# Each session is written to RAW_DIRECTORY/<circuit>/<timestamp>_<session type>, see SessionPartition
+RAW_DIRECTORY = "./data/raw"
+# The capture of the whole recording, which may span several sessions.
+# It is kept outside RAW_DIRECTORY, whose subdirectories are all circuits for sanitize_all_circuits
+RECORDINGS_DIRECTORY = "./data/recordings"
+DATA_DIRECTORY = f"{RECORDINGS_DIRECTORY}/" + CURRENT_TIMESTAMP
+CAPTURE_FILE = capture_file_path(DATA_DIRECTORY, f"capture_{CURRENT_TIMESTAMP}")
+# The capture is kept as a compressed archive of independently decompressible blocks (ZLIB, LZMA, or None to keep it raw)
+ARCHIVE_COMPRESSION = ZLIB
+ARCHIVE_FILE = os.path.join(DATA_DIRECTORY, f"capture_{CURRENT_TIMESTAMP}{ARCHIVE_EXTENSION}")
+RECORDED_PACKET_IDS = frozenset(packet_type.value for packet_type in PacketType)
+# Cars decoded from the 22-car packets: PLAYER_CAR (m_playerCarIndex, recorded as <field>_player_ columns),
+# a list of car indices, or None for all cars
+RECORDED_CARS = PLAYER_CAR
+record_codecs = build_car_slice_codecs(RECORDED_CARS) if RECORDED_CARS is not None else packet_id_to_codec_map
+
+# Size in bytes of the records each stream keeps in memory; beyond it, records are spilled to chunk files
+STREAM_MEMORY_BUDGET = 64 * 1024 * 1024
+CHUNK_DIRECTORY = os.path.join(DATA_DIRECTORY, "chunks")
+chunk_spiller = ChunkSpiller()
+# Whether each recorded session is committed to the master dataset (DATASET_DIRECTORY) once saved
+UPDATE_MASTER_DATASET = True
+
+def create_stream(name, packet_type):
+    """
+    Creates the typed column buffer of a stream, spilling to CHUNK_DIRECTORY beyond STREAM_MEMORY_BUDGET.
+
+    :param str name: The name of the stream, used in file names.
+    :param PacketType packet_type: The packet type of the stream.
+    """
+    return StreamBuffer(name, packet_type.value, STREAM_MEMORY_BUDGET, CHUNK_DIRECTORY, chunk_spiller)
+
+# Typed column buffers to store packets for each stream
+motion_packets = create_stream("motion", PacketType.MOTION_DATA)
+session_packets = create_stream("session", PacketType.SESSION_DATA)
+lap_packets = create_stream("lap", PacketType.LAP_DATA)
+car_setup_packets = create_stream("car_setup", PacketType.CAR_SETUP_DATA)
+car_telemetry_packets = create_stream("car_telemetry", PacketType.CAR_TELEMETRY_DATA)
+time_trial_packets = create_stream("time_trial", PacketType.TIME_TRIAL_DATA)
+streams = {stream.packet_id: stream for stream in (motion_packets, session_packets, lap_packets,
+                                                   car_setup_packets, car_telemetry_packets, time_trial_packets)}
 
 def initialize_socket():
     """Creates and configures the UDP socket."""
@@ -32,116 +69,95 @@ def initialize_socket():
     udp_socket.setblocking(False)
     return udp_socket
 
-def generate_file_path(packet_type):
+def generate_file_path(packet_type, directory):
     """
     Generates a timestamped file path for storing recorded data.
     The file path is based on the packet type and the current timestamp.
 
     :param packet_type: The type of packet (e.g., "motion", "session", etc.)
+    :param directory: The directory of the session partition.
     """
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    return f"{DATA_DIRECTORY}/{packet_type}_data_{timestamp}.csv"
+    return f"{directory}/{packet_type}_data_{timestamp}.csv"
+
+def slugify(name):
+    """
+    Returns a lower-case name usable in file paths, e.g. "Sakhir (Bahrain)" -> "sakhir_bahrain".
+
+    :param str name: The name to convert.
+    """
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+SESSION_UID_FIELD = struct.Struct("<Q")
+SESSION_UID_OFFSET = PacketHeader.m_sessionUID.offset
+TRACK_ID_FIELD = struct.Struct("<b")
+TRACK_ID_OFFSET = PacketSessionData.m_trackId.offset
+SESSION_TYPE_OFFSET = PacketSessionData.m_sessionType.offset
+
+class SessionPartition:
+    """
+    A session of the recording, written to its own output partition.
+    A new partition starts whenever m_sessionUID changes, or when a session packet reports another track or session type.
+    The track and session type are only known once the first session packet of the session is read.
+    Attributes:
+        session_uid (int): The m_sessionUID of the session.
+        track_id (int): The m_trackId of the session, or None until a session packet is read.
+        session_type (int): The m_sessionType of the session, or None until a session packet is read.
+        packets (int): Number of packets of the session.
+        general_data (tuple): The (general CSV path, rows) returned by save_session_csvs once the partition is saved.
+    """
+    def __init__(self, session_uid, track_id=None, session_type=None):
+        self.session_uid = session_uid
+        self.track_id = track_id
+        self.session_type = session_type
+        self.packets = 0
+        self.general_data = None
+
+    @property
+    def circuit(self):
+        """The circuit name used as partition directory, e.g. "monza"."""
+        return slugify(track_ids.get(self.track_id, track_ids[-1])[0])
+
+    @property
+    def session_name(self):
+        """The session name used as partition name, e.g. "2024-05-01_10-00-00_qualifying_1"."""
+        return f"{CURRENT_TIMESTAMP}_{slugify(session_types.get(self.session_type, session_types[0]))}"
+
+    def directory(self):
+        """Returns a directory for the partition that is not used yet, suffixed when the same session type is repeated."""
+        base_directory = os.path.join(RAW_DIRECTORY, self.circuit, self.session_name)
+        directory, suffix = base_directory, 2
+        while os.path.exists(directory):
+            directory = f"{base_directory}_{suffix}"
+            suffix += 1
+        return directory
+
+    def __repr__(self) -> str:
+        return f"SessionPartition({self.circuit}, {self.session_name}, uid={self.session_uid}, {self.packets} packets)"
 
 def parse_packet(data):
     """
-    Deserializes a UDP packet and converts it to a dictionary.
-    The PacketHeader is used to determine the packet type.
+    Decodes a UDP packet to a flat record with the codec of its packet id.
+    The schema of the record (column names and format codes) is computed once per packet class,
+    so a packet becomes a tuple of values instead of nested dictionaries.
+    When RECORDED_CARS is set, only the selected cars' slices of the 22-car packets are decoded.
 
     :param data: The raw byte data of the packet.
+    :return: A tuple (packet_id, schema, values), or None if the packet is not a known, complete packet.
     """
     try:
-        header = PacketHeader.from_buffer_copy(data)
-        packet_type = packet_header_to_class_map.get(header.m_packetId)
-        if packet_type:
-            packet = packet_type.from_buffer_copy(data)
-            packet_dict = ctypes_to_dict(packet)
-            # Also extract the packetId from the header and put it at the top level
-            packet_dict["m_packetId"] = ctypes_to_dict(header)["m_packetId"]
-            return packet_dict
+        packet_id = data[PACKET_ID_OFFSET]
+        codec = record_codecs.get(packet_id)
+        if codec:
+            schema, values = codec.decode_record(data)
+            return packet_id, schema, values
     except Exception as e:
         print(f"Error parsing packet: {e}")
     return None
 
-
-def add_unique_key(packet):
-    """
-    Adds a unique key to the packet dictionary composed of m_sessionTime and m_frameIdentifier.
-    This key will help during the join/merge process later.
-
-    :param packet: The packet dictionary to which the unique key will be added.
-    """
-    try:
-        session_time = packet.get("m_sessionTime")
-        frame_identifier = packet.get("m_frameIdentifier")
-        # Combine the two fields into a string; you can also store it as a tuple if desired.
-        packet["unique_key"] = f"{session_time}_{frame_identifier}"
-    except Exception as e:
-        print(f"Error adding unique key: {e}")
-    return packet
-
-def process_motion_packet(packet):
-    """
-    Processes a motion packet, adding a unique key and storing it in the motion_packets list.
-    
-    :param packet: The motion packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    motion_packets.append(flattened_packet)
-
-def process_session_packet(packet):
-    """
-    Processes a session packet, adding a unique key and storing it in the session_packets list.
-    
-    :param packet: The session packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    session_packets.append(flattened_packet)
-
-def process_lap_packet(packet):
-    """
-    Processes a lap packet, adding a unique key and storing it in the lap_packets list.
-    
-    :param packet: The lap packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    lap_packets.append(flattened_packet)
-
-def process_car_setup_packet(packet):
-    """
-    Processes a car setup packet, adding a unique key and storing it in the car_setup_packets list.
-    
-    :param packet: The car setup packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    car_setup_packets.append(flattened_packet)
-
-def process_car_telemetry_packet(packet):
-    """
-    Processes a car telemetry packet, adding a unique key and storing it in the car_telemetry_packets list.
-    
-    :param packet: The car telemetry packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    car_telemetry_packets.append(flattened_packet)
-
-def process_time_trial_packet(packet):
-    """
-    Processes a time trial packet, adding a unique key and storing it in the time_trial_packets list.
-    
-    :param packet: The time trial packet dictionary to be processed.
-    """
-    packet = add_unique_key(packet)
-    flattened_packet = flatten_dict(packet)
-    time_trial_packets.append(flattened_packet)
-
 def process_packet(parsed_data):
     """
-    Routes the parsed packet to the correct processing function based on its packet ID.
+    Appends the parsed packet to the column buffers of its stream, based on its packet ID.
     The IDs are defined in the UDP spec for EA F1 24:
       - Motion Data      : 0
       - Session Data     : 1
@@ -150,103 +166,182 @@ def process_packet(parsed_data):
       - Car Telemetry Data: 6
       - Time Trial Data  : 14
 
-    :param parsed_data: The parsed packet data as a dictionary.
+    :param parsed_data: The (packet_id, schema, values) tuple returned by parse_packet.
     """
     if parsed_data is None:
         return
 
-    packet_id = parsed_data["m_header"].get("m_packetId")
-    if packet_id == PacketType.MOTION_DATA.value:
-        process_motion_packet(parsed_data)
-    elif packet_id == PacketType.SESSION_DATA.value:
-        process_session_packet(parsed_data)
-    elif packet_id == PacketType.LAP_DATA.value:
-        process_lap_packet(parsed_data)
-    elif packet_id == PacketType.CAR_SETUP_DATA.value:
-        process_car_setup_packet(parsed_data)
-    elif packet_id == PacketType.CAR_TELEMETRY_DATA.value:
-        process_car_telemetry_packet(parsed_data)
-    elif packet_id == PacketType.TIME_TRIAL_DATA.value:
-        process_time_trial_packet(parsed_data)
+    packet_id, schema, values = parsed_data
+    stream = streams.get(packet_id)
+    if stream is not None:
+        stream.append(schema, values)
     # Ignore other packet types if not needed
 
-def receive_packets(udp_socket: socket.socket):
+async def record_packets(udp_socket: socket.socket, capture_writer: CaptureWriter):
     """
-    Continuously receives packets and processes them until the stop command is received.
-    
+    Streams every datagram received on the socket to the capture file, with its receive timestamp,
+    using the asyncio ingestion backend, until the stop command is received.
+    Decoding is deferred to the end of the recording (see ``derive_packets_from_capture``).
+    Duplicate and stale datagrams (e.g. delivered twice by a redirect chain) are dropped before being stored.
+
     :param socket.socket udp_socket: The UDP socket to listen for incoming packets.
+    :param CaptureWriter capture_writer: The writer of the capture file.
+    :return: The DuplicateFilter, with its counters.
     """
-    global EXECUTION_COMMAND
-    print("Receiving UDP packets. Type 'stop' to end recording.")
-    
+    duplicate_filter = DuplicateFilter()
+
+    async def capture_datagram(data):
+        if duplicate_filter.accept(data):
+            capture_writer.write(data)
+
+    listener = AsyncListener(ports=(), sockets=(udp_socket,))
+    listener.add_consumer(capture_datagram, raw=True, queue_size=4096)
+    await listener.start()
     while EXECUTION_COMMAND != "stop":
-        try:
-            data, _ = udp_socket.recvfrom(BUFFER_SIZE)
-            # print("Received data:", data)
-            parsed_data = parse_packet(data)
-            # print("Parsed data:", parsed_data)
-            if parsed_data:
-                process_packet(parsed_data)
-        except BlockingIOError:
-            pass
-    
-    udp_socket.close()
+        await asyncio.sleep(0.2)
+    await listener.stop()
+    return duplicate_filter
 
-def save_data_to_csv(data, file_path):
+def receive_packets(udp_socket: socket.socket):
     """
-    Saves the list of packet dictionaries to a CSV file.
+    Receives packets and streams them to the capture file until the stop command is received.
+    The event loop sleeps while no datagram is available instead of polling the socket.
     
-    :param data: The list of packet dictionaries to be saved.
-    :param file_path: The path where the CSV file will be saved.
+    :param socket.socket udp_socket: The UDP socket to listen for incoming packets.
     """
-    if data:
-        df = pd.DataFrame(data)
-        df.to_csv(file_path, index=False)
-        print(f"Saved {len(df)} records to {file_path}")
-    else:
-        print(f"No data to save for in {file_path}")
-
-def filter_columns(df):
+    print("Receiving UDP packets. Type 'stop' to end recording.")
+    with CaptureWriter(CAPTURE_FILE) as capture_writer:
+        duplicate_filter = asyncio.run(record_packets(udp_socket, capture_writer))
+    udp_socket.close()
+    print(f"Captured {capture_writer.records} packets ({capture_writer.bytes_written} bytes) to {CAPTURE_FILE}, "
+          f"dropped {duplicate_filter.duplicates} duplicate and {duplicate_filter.stale} stale packets")
+
+def derive_packets_from_capture(capture_file):
+    """
+    Parses the recorded packet types of a capture or archive file into the per-stream column buffers,
+    splitting the recording into one partition per session.
+    m_sessionUID is read from every header, and the track and session type from the session packets:
+    on each change, the streams of the previous session are saved to its partition and cleared.
+    Only the packet id stored in each record is read for the packet types that are not recorded.
+
+    :param str capture_file: The path of the capture or archive file.
+    :return: The list of saved SessionPartition instances.
+    """
+    skipped_packets = {}
+    partitions = []
+    partition = None
+    for _, packet_id, data in read_records(capture_file):
+        if len(data) < SESSION_UID_OFFSET + SESSION_UID_FIELD.size:
+            continue
+        session_uid = SESSION_UID_FIELD.unpack_from(data, SESSION_UID_OFFSET)[0]
+        if partition is None or session_uid != partition.session_uid:
+            if partition is not None:
+                finalize_partition(partition)
+            partition = SessionPartition(session_uid)
+            partitions.append(partition)
+        if packet_id == PacketType.SESSION_DATA.value and len(data) > TRACK_ID_OFFSET:
+            track_id = TRACK_ID_FIELD.unpack_from(data, TRACK_ID_OFFSET)[0]
+            session_type = data[SESSION_TYPE_OFFSET]
+            if partition.track_id is None:
+                partition.track_id, partition.session_type = track_id, session_type
+            elif (track_id, session_type) != (partition.track_id, partition.session_type):
+                finalize_partition(partition)
+                partition = SessionPartition(session_uid, track_id, session_type)
+                partitions.append(partition)
+        partition.packets += 1
+        if packet_id not in RECORDED_PACKET_IDS:
+            skipped_packets[packet_id] = skipped_packets.get(packet_id, 0) + 1
+            continue
+        parsed_data = parse_packet(data)
+        if parsed_data:
+            process_packet(parsed_data)
+    if partition is not None:
+        finalize_partition(partition)
+    if skipped_packets:
+        print(f"Skipped packets by id: {dict(sorted(skipped_packets.items()))}")
+    return partitions
+
+def finalize_partition(partition):
+    """
+    Saves the streams of a session to its partition directory and clears them for the next session.
+    With UPDATE_MASTER_DATASET, the general CSV of the session is also committed to the master dataset.
+
+    :param SessionPartition partition: The session to save.
+    """
+    print(f"Saving {partition}")
+    directory = partition.directory()
+    os.makedirs(directory)
+    partition.general_data = save_session_csvs(directory, partition.session_name)
+    for stream in streams.values():
+        stream.clear()
+    if UPDATE_MASTER_DATASET and partition.general_data is not None:
+        # The directory name is unique even when the same session type is recorded twice
+        update_master_dataset(*partition.general_data, partition.circuit, os.path.basename(directory))
+
+def append_to_csv(df, file_path, columns=None):
+    """
+    Appends a DataFrame to a CSV file, writing the header if the file does not exist yet.
+
+    :param df: The DataFrame to append.
+    :param file_path: The path of the CSV file.
+    :param columns: The columns of the file, missing ones being left empty. Default is None (the DataFrame's columns).
+    """
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    header = not os.path.exists(file_path)
+    df.to_csv(file_path, mode="w" if header else "a", header=header, index=False)
+
+def general_columns(columns):
     """
     Only keep m_header_m_sessionTime and m_header_m_frameIdentifier from header columns.
-    
-    :param df: The DataFrame containing the packet data.
-    :return: A DataFrame with filtered columns.
+    The selection is made on the column names of a stream's schema, before any DataFrame is built.
+
+    :param columns: The column names of a stream.
+    :return: The list of columns kept in the general table.
     """
     keep = {"m_header_m_sessionTime", "m_header_m_frameIdentifier"}
-    cols = [col for col in df.columns if not col.startswith("m_header_") or col in keep]
-    return df[cols]
-
-def join_session_csvs():
-    """
-    Joins the six CSV files into one general CSV file for this session.
-    This function searches for CSV files in the DATA_DIRECTORY that match the expected patterns
-    for each packet type and concatenates them into a single DataFrame.
-    The resulting DataFrame is then saved as a general CSV file.
-    If no CSV files are found, it prints a message and returns None.
-
-    :return: The path to the general CSV file or None if no files were found.
-    """
-    csv_types = ["motion", "session", "lap", "car_setup", "car_telemetry", "time_trial"]
-    df_list = []
-    for t in csv_types:
-        # Find files that match the pattern in this session folder.
-        files = glob.glob(os.path.join(DATA_DIRECTORY, f"{t}_data_*.csv"))
-        for f in files:
-            df = pd.read_csv(f)
-            df = filter_columns(df)
-            # Optionally add a column indicating the packet type:
-            df["packet_type"] = t
-            df_list.append(df)
-    if df_list:
-        general_df = pd.concat(df_list, ignore_index=True, sort=False)
-        general_csv = os.path.join(DATA_DIRECTORY, f"general_data_{CURRENT_TIMESTAMP}.csv")
-        general_df.to_csv(general_csv, index=False)
-        print(f"General CSV saved: {general_csv}")
-        return general_csv
-    else:
-        print("No CSV files to join in the session folder.")
+    return [col for col in columns if not col.startswith("m_header_") or col in keep]
+
+def save_session_csvs(directory, session_name):
+    """
+    Saves each stream to its own CSV file and joins them into one general CSV file for this session,
+    in a single pass over the column buffers: each chunk of a stream is built once as a DataFrame,
+    appended to the stream CSV and, with its general columns only, to the general CSV,
+    without reading the CSV files back. Spilled chunks are merged one at a time.
+
+    :param str directory: The directory of the session partition.
+    :param str session_name: The name of the session, used in the general CSV file name.
+    :return: A tuple (general CSV path, number of rows), or None if no packet was recorded.
+    """
+    recorded_streams = [stream for stream in streams.values() if len(stream)]
+    for stream in streams.values():
+        if not len(stream):
+            print(f"No data to save for the {stream.name} stream")
+    if not recorded_streams:
+        print("No data to join for this session.")
         return None
+
+    # Columns of the general CSV, in the order pd.concat would give them
+    general_csv_columns = {}
+    for stream in recorded_streams:
+        general_csv_columns.update(dict.fromkeys(general_columns(stream.columns)))
+    general_csv_columns = list(general_csv_columns) + ["packet_type"]
+
+    general_csv = os.path.join(directory, f"general_data_{session_name}.csv")
+    rows = 0
+    for stream in recorded_streams:
+        file_path = generate_file_path(stream.name, directory)
+        records = len(stream)
+        stream_columns = stream.columns
+        for df in stream.dataframes():
+            append_to_csv(df, file_path, stream_columns)
+            append_to_csv(df[general_columns(df.columns)].assign(packet_type=stream.name),
+                          general_csv, general_csv_columns)
+        stream.remove_spilled_chunks()
+        rows += records
+        print(f"Saved {records} records to {file_path}")
+    print(f"General CSV saved: {general_csv}")
+    return general_csv, rows
     
 def save_general_csv(df, file_path):
     """
@@ -258,23 +353,34 @@ def save_general_csv(df, file_path):
     df.to_csv(file_path, index=False)
     print(f"General CSV saved: {file_path}")
 
-def update_master_dataset(new_general_csv):
+def update_master_dataset(general_csv, rows, circuit, session_name):
     """
-    Updates the master dataset CSV with the new general CSV.
+    Adds the general CSV of a session to the master dataset as the partition of its circuit and session.
+    Only this session is written: the dataset is append-only, partitioned by circuit and session,
+    and the partition becomes visible once the manifest is atomically replaced (see ``dataset.commit_partition``).
     
-    :param new_general_csv: The path to the new general CSV file to be added to the master dataset.
-    """
-    master_csv = "./data/dataset.csv"
-    # Ensure the parent folder for the master CSV exists:
-    os.makedirs("./data", exist_ok=True)
-    new_df = pd.read_csv(new_general_csv)
-    if os.path.exists(master_csv):
-        master_df = pd.read_csv(master_csv)
-        combined_df = pd.concat([master_df, new_df], ignore_index=True, sort=False)
-    else:
-        combined_df = new_df
-    combined_df.to_csv(master_csv, index=False)
-    print(f"Master dataset updated: {master_csv}")
+    :param general_csv: The path of the general CSV file of the session, as returned by save_session_csvs.
+    :param rows: The number of rows of the general CSV file, if known.
+    :param circuit: The circuit of the session (see SessionPartition.circuit).
+    :param session_name: The name of the session in the dataset, e.g. the name of its partition directory.
+    """
+    partition_path = commit_partition(general_csv, circuit, session_name, DATASET_DIRECTORY, rows)
+    print(f"Master dataset updated: {partition_path}")
+
+def archive_capture(capture_file, archive_file, compression=ARCHIVE_COMPRESSION):
+    """
+    Compresses the raw capture to an archive and removes the raw capture once the archive is complete.
+    The archive can be read back with ``capture.read_records``, seeked and replayed with ``utils/sender.py``.
+
+    :param str capture_file: The path of the raw capture file.
+    :param str archive_file: The path of the archive file.
+    :param str compression: ZLIB or LZMA. Default is ARCHIVE_COMPRESSION.
+    """
+    archive_writer = compress_capture(capture_file, archive_file, compression)
+    capture_size = os.path.getsize(capture_file)
+    os.remove(capture_file)
+    print(f"Archived {archive_writer.records} packets to {archive_file} "
+          f"({capture_size} bytes compressed to {archive_writer.bytes_written})")
 
 def listen_for_stop_command():
     """Listens for the 'stop' command to end data recording."""
@@ -299,18 +405,13 @@ def main():
     receiver_thread.join()
     input_thread.join()
 
-    # After data collection, save each stream to its own CSV file.
-    save_data_to_csv(motion_packets, generate_file_path("motion"))
-    save_data_to_csv(session_packets, generate_file_path("session"))
-    save_data_to_csv(lap_packets, generate_file_path("lap"))
-    save_data_to_csv(car_setup_packets, generate_file_path("car_setup"))
-    save_data_to_csv(car_telemetry_packets, generate_file_path("car_telemetry"))
-    save_data_to_csv(time_trial_packets, generate_file_path("time_trial"))
-
-    # Join the six CSV files into one general CSV file for this session.
-    join_session_csvs()
-    # if general_csv:
-    #     update_master_dataset(general_csv)
+    # After data collection, derive each stream from the capture, save it to its own CSV file
+    # and join the streams into one general CSV file, in one partition per recorded session.
+    partitions = derive_packets_from_capture(CAPTURE_FILE)
+    print(f"Recorded {len(partitions)} session(s): {partitions}")
+    chunk_spiller.close()
+    if ARCHIVE_COMPRESSION is not None:
+        archive_capture(CAPTURE_FILE, ARCHIVE_FILE)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,5 @@
 import os
 import pandas as pd
-from hashlib import md5
 from pathlib import Path
 from typing import List
 
@@ -63,6 +62,30 @@ def sanitize_sessions_for_circuit(circuit_dir: Path, circuit_name: str) -> pd.Da
         return pd.concat(all_session_dfs, ignore_index=True)
     return None
 
+def car_prefix(df: pd.DataFrame, cars_field: str) -> str:
+    """
+    Devuelve el prefijo de las columnas del coche del jugador: ``<campo>_player_`` en las grabaciones
+    que solo decodifican el coche del jugador, ``<campo>_0_`` en las que decodifican los 22 coches.
+
+    :param pd.DataFrame df: Datos de una sesión.
+    :param str cars_field: Nombre del campo por coche (por ejemplo m_lapData).
+    """
+    player_prefix = f"{cars_field}_player_"
+    if any(col.startswith(player_prefix) for col in df.columns):
+        return player_prefix
+    return f"{cars_field}_0_"
+
+def compute_setup_hash(setup_data: pd.DataFrame, setup_cols: List[str]) -> pd.Series:
+    """
+    Calcula un hash por fila de los reglajes de forma vectorizada con ``pd.util.hash_pandas_object``,
+    en lugar de construir una cadena y un md5 en Python para cada fila.
+    Dos filas con los mismos valores en las columnas de reglaje tienen el mismo hash (uint64).
+
+    :param pd.DataFrame setup_data: Datos de reglajes del coche.
+    :param List[str] setup_cols: Columnas de reglaje a considerar.
+    """
+    return pd.util.hash_pandas_object(setup_data[setup_cols], index=False)
+
 def sanitize_single_session(lap_file: Path, setup_file: Path, circuit_name: str) -> pd.DataFrame:
     """
     Sanitiza los datos de una sola sesión: vincula los tiempos de vuelta con el 
@@ -75,16 +98,17 @@ def sanitize_single_session(lap_file: Path, setup_file: Path, circuit_name: str)
     lap_data = pd.read_csv(lap_file)
     setup_data = pd.read_csv(setup_file)
 
-    lap_data = lap_data[lap_data["m_lapData_0_m_lastLapTimeInMS"] > 0]
-    lap_times = lap_data[["m_header_m_sessionTime", "m_lapData_0_m_lastLapTimeInMS"]].drop_duplicates()
+    lap_time_col = car_prefix(lap_data, "m_lapData") + "m_lastLapTimeInMS"
+    setup_prefix = car_prefix(setup_data, "m_carSetups")
+
+    lap_data = lap_data[lap_data[lap_time_col] > 0]
+    lap_times = lap_data[["m_header_m_sessionTime", lap_time_col]].drop_duplicates()
     lap_times = lap_times.sort_values("m_header_m_sessionTime").drop_duplicates(
-        subset=["m_lapData_0_m_lastLapTimeInMS"], keep="last"
+        subset=[lap_time_col], keep="last"
     )
 
-    setup_cols = [col for col in setup_data.columns if col.startswith("m_carSetups_0_")]
-    setup_data["setup_hash"] = setup_data[setup_cols].apply(
-        lambda row: md5(str(tuple(row)).encode()).hexdigest(), axis=1
-    )
+    setup_cols = [col for col in setup_data.columns if col.startswith(setup_prefix)]
+    setup_data["setup_hash"] = compute_setup_hash(setup_data, setup_cols)
     unique_setups = setup_data.sort_values("m_header_m_sessionTime").drop_duplicates(subset=["setup_hash"])
 
     merged = pd.merge_asof(
@@ -100,10 +124,10 @@ def sanitize_single_session(lap_file: Path, setup_file: Path, circuit_name: str)
         return None
 
     merged = merged.drop(columns=["m_header_m_sessionTime", "setup_hash"])
-    merged = merged.rename(columns={"m_lapData_0_m_lastLapTimeInMS": "lapTimeInMS"})
+    merged = merged.rename(columns={lap_time_col: "lapTimeInMS"})
     merged.columns = [
-        "lapTimeInMS" if col == "lapTimeInMS" else col.replace("m_carSetups_0_", "")
+        "lapTimeInMS" if col == "lapTimeInMS" else col.replace(setup_prefix, "")
         for col in merged.columns
     ]
     merged["circuit"] = circuit_name
-    return merged
\ No newline at end of file
+    return merged
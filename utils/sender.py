@@ -1,18 +1,111 @@
+import argparse
 import socket
-import pickle
 import time
-import sys
+import numpy as np
 
-my_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
-PORT = 20777
-if len(sys.argv)>1:
-    PORT = int(sys.argv[1])
+from capture import open_reader
 
-with open('data.pickle', 'ab') as file:
-    b = pickle.dumps(file)
-i=0
+RECEIVE_CLOCK = "receive"
+SESSION_CLOCK = "session"
+MAX_SPEED = "max"
+REPORT_INTERVAL = 1.0
 
-while True:
-    i = (i + 1) % len(b)
-    my_socket.sendto(b[i], ("127.0.0.1", PORT))
-    time.sleep(0.01)
+
+def replay_schedule(index, clock=RECEIVE_CLOCK):
+    """
+    Computes the time at which each record of a capture must be sent, relative to the first one.
+    With the session clock, the schedule follows m_sessionTime and restarts from the previous record
+    when the session changes or the session time goes backwards (flashback, new session).
+
+    :param numpy.ndarray index: The index of the capture (see capture.INDEX_DTYPE).
+    :param str clock: RECEIVE_CLOCK to use the receive timestamps, SESSION_CLOCK to use m_sessionTime.
+    :return: A float64 numpy array of offsets in seconds.
+    """
+    if len(index) == 0:
+        return np.zeros(0)
+    times = index["timestamp"] if clock == RECEIVE_CLOCK else index["session_time"].astype(np.float64)
+    deltas = np.diff(times, prepend=times[0])
+    if clock == SESSION_CLOCK:
+        session_changed = np.diff(index["session_uid"], prepend=index["session_uid"][0]) != 0
+        deltas[session_changed] = 0
+    deltas[deltas < 0] = 0
+    return np.cumsum(deltas)
+
+
+def replay(capture_file, address="127.0.0.1", port=20777, speed=1.0, clock=RECEIVE_CLOCK, verbose=True,
+           start_time=None):
+    """
+    Re-emits the datagrams of a capture or archive over UDP, preserving the original inter-packet timing.
+    Archives are decompressed one block at a time, from the block holding start_time.
+
+    :param str capture_file: The path of the capture (.f1cap) or archive (.f1arc) file.
+    :param str address: The address to send the datagrams to. Default is 127.0.0.1.
+    :param int port: The port to send the datagrams to. Default is 20777.
+    :param speed: The speed multiplier (e.g. 1 or 4), or MAX_SPEED to send as fast as possible. Default is 1.
+    :param str clock: RECEIVE_CLOCK or SESSION_CLOCK, the timing to reproduce. Default is RECEIVE_CLOCK.
+    :param bool verbose: Whether to print the achieved rate every second. Default is True.
+    :param float start_time: The session time of the first session to start from. Default is None (the beginning).
+    :return: A dict with the number of packets sent, the duration and the achieved packets/s.
+    """
+    udp_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    destination = (address, int(port))
+    sent = 0
+    with open_reader(capture_file) as reader:
+        total = len(reader)
+        start = last_report = time.perf_counter()
+        last_report_sent = 0
+        previous_row, previous_offset = None, 0.0
+        for index, buffer in reader.blocks(start_time):
+            if len(index) == 0:
+                continue
+            # The schedule of a block continues from the last record of the previous block
+            if previous_row is None:
+                schedule = replay_schedule(index, clock)
+            else:
+                schedule = replay_schedule(np.concatenate([previous_row, index]), clock)[1:] + previous_offset
+            previous_row, previous_offset = index[-1:], schedule[-1]
+            if speed != MAX_SPEED:
+                schedule = schedule / float(speed)
+            view = memoryview(buffer)
+            for offset, size, send_time in zip(index["offset"].tolist(), index["size"].tolist(), schedule.tolist()):
+                if speed != MAX_SPEED:
+                    delay = start + send_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                try:
+                    udp_socket.sendto(view[offset:offset + size], destination)
+                    sent += 1
+                except ConnectionResetError as e:  # Nothing listening on the localhost port (Windows)
+                    print(e)
+                now = time.perf_counter()
+                if verbose and now - last_report >= REPORT_INTERVAL:
+                    print(f"{(sent - last_report_sent) / (now - last_report):.0f} packets/s ({sent}/{total})")
+                    last_report, last_report_sent = now, sent
+            view.release()
+    udp_socket.close()
+    duration = time.perf_counter() - start
+    return {"packets": sent, "duration": duration, "packets_per_second": sent / duration if duration > 0 else 0.0}
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Replays a recorded capture over UDP.")
+    parser.add_argument("capture_file", help="The capture (.f1cap) or archive (.f1arc) file to replay.")
+    parser.add_argument("--address", default="127.0.0.1", help="The address to send the packets to.")
+    parser.add_argument("--port", type=int, default=20777, help="The port to send the packets to.")
+    parser.add_argument("--speed", default="1",
+                        help=f"The speed multiplier (e.g. 1, 4), or '{MAX_SPEED}' to send as fast as possible.")
+    parser.add_argument("--clock", choices=[RECEIVE_CLOCK, SESSION_CLOCK], default=RECEIVE_CLOCK,
+                        help="Reproduce the receive timestamps or the m_sessionTime of the packets.")
+    parser.add_argument("--start", type=float, default=None,
+                        help="The session time (seconds) of the first session to start the replay from.")
+    args = parser.parse_args()
+
+    speed = MAX_SPEED if args.speed == MAX_SPEED else float(args.speed)
+    result = replay(args.capture_file, args.address, args.port, speed, args.clock, start_time=args.start)
+    print(f"Sent {result['packets']} packets in {result['duration']:.2f}s "
+          f"({result['packets_per_second']:.0f} packets/s)")
+
+
+if __name__ == "__main__":
+    main()
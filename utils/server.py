@@ -1,10 +1,19 @@
+import argparse
+import selectors
 import socket
+import time
+
+DEFAULT_PORTS = [20773, 20775, 20776, 20777]
+BUFFER_SIZE = 2048
+STATS_INTERVAL = 10.0
+MAX_BATCH = 64  # Datagrams drained from a socket per readiness event, so one busy port cannot starve the others
+
 
 def create_socket(port):
     """
     Creates a UDP socket bound to the specified port.
     The socket is set to non-blocking mode to allow for asynchronous operations.
-    
+
     :param port: The port number to bind the socket to.
     :return: A UDP socket object.
     """
@@ -14,20 +23,179 @@ def create_socket(port):
     return my_socket
 
 
-def get(my_socket):
-    try:
-        packet = my_socket.recv(2048)
-        my_socket.sendto(packet, ("90.3.127.79", 20777))
-        #my_socket.sendto(packet, ("78.118.228.123", 20785))
-        #my_socket.sendto(packet, ("127.0.0.1", 20795))
-    except BlockingIOError:
-        return
-    except ConnectionResetError as e:
-        print(e)
+def parse_destination(destination):
+    """
+    Parses a destination given as "address:port".
+
+    :param str destination: The destination, e.g. "127.0.0.1:20777".
+    :return: An (address, port) tuple.
+    """
+    address, _, port = destination.rpartition(":")
+    if not address or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"Invalid destination '{destination}', expected address:port")
+    return address, int(port)
+
+
+class RelayPort:
+    """
+    A listened port of the relay and its statistics.
+    Attributes:
+        port (int): The listened port.
+        socket (socket.socket): The non-blocking socket bound to the port.
+        received (int): Number of datagrams received.
+        received_bytes (int): Number of bytes received.
+        forwarded (int): Number of datagrams sent, counted once per destination.
+        dropped (int): Number of datagrams that could not be sent to a destination.
+        last_error (str): The last send error, if any.
+    """
+    def __init__(self, port):
+        self.port = int(port)
+        self.socket = create_socket(self.port)
+        self.received = 0
+        self.received_bytes = 0
+        self.forwarded = 0
+        self.dropped = 0
+        self.last_error = None
+        self._reported = (0, 0, 0)
+
+    def statistics(self, interval=None):
+        """
+        Returns the counters of the port, and its throughput since the previous call if interval is given.
+
+        :param float interval: The time in seconds since the previous report. Default is None.
+        """
+        statistics = {"received": self.received, "received_bytes": self.received_bytes,
+                      "forwarded": self.forwarded, "dropped": self.dropped, "last_error": self.last_error}
+        if interval:
+            received, received_bytes, dropped = self._reported
+            statistics["packets_per_second"] = (self.received - received) / interval
+            statistics["bytes_per_second"] = (self.received_bytes - received_bytes) / interval
+            statistics["dropped_in_interval"] = self.dropped - dropped
+            self._reported = (self.received, self.received_bytes, self.dropped)
+        return statistics
+
 
+class UDPRelay:
+    """
+    A relay forwarding the datagrams received on several ports to several destinations.
+    The sockets are watched with ``selectors`` (epoll on Linux), so the relay sleeps while no datagram arrives
+    instead of polling non-blocking sockets in a loop.
+    Attributes:
+        ports (list): The RelayPort instances.
+        destinations (list): The (address, port) tuples the datagrams are forwarded to.
+        stats_interval (float): The time in seconds between statistics reports, or None to disable them.
+        selector (selectors.BaseSelector): The selector watching the sockets.
+    """
+    def __init__(self, ports, destinations, stats_interval=STATS_INTERVAL):
+        self.ports = [RelayPort(port) for port in ports]
+        self.destinations = list(destinations)
+        self.stats_interval = stats_interval
+        self.selector = selectors.DefaultSelector()
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._running = False
+        # A socket pair wakes the selector up when the relay is stopped from another thread
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self.selector.register(self._wakeup_receiver, selectors.EVENT_READ, None)
+        for relay_port in self.ports:
+            self.selector.register(relay_port.socket, selectors.EVENT_READ, relay_port)
+
+    def _forward(self, relay_port):
+        """Drains the datagrams waiting on a port and sends them to every destination."""
+        view = memoryview(self._buffer)
+        for _ in range(MAX_BATCH):
+            try:
+                size = relay_port.socket.recv_into(self._buffer)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            relay_port.received += 1
+            relay_port.received_bytes += size
+            for destination in self.destinations:
+                try:
+                    relay_port.socket.sendto(view[:size], destination)
+                    relay_port.forwarded += 1
+                except OSError as e:  # Full send buffer, unreachable destination...
+                    relay_port.dropped += 1
+                    relay_port.last_error = str(e)
+
+    def statistics(self, interval=None):
+        """
+        Returns the statistics of every port.
+
+        :param float interval: The time in seconds since the previous report, to compute throughputs. Default is None.
+        :return: A dict mapping each port to its statistics.
+        """
+        return {relay_port.port: relay_port.statistics(interval) for relay_port in self.ports}
+
+    def report(self, interval):
+        """Prints the throughput and drops of every port over the last interval."""
+        for port, statistics in self.statistics(interval).items():
+            print(f"Port {port}: {statistics['packets_per_second']:.1f} packets/s, "
+                  f"{statistics['bytes_per_second'] / 1024:.1f} KB/s, "
+                  f"{statistics['dropped_in_interval']} dropped (total received {statistics['received']}, "
+                  f"dropped {statistics['dropped']})")
+
+    def run(self):
+        """Forwards datagrams until ``stop`` is called."""
+        self._running = True
+        last_report = time.monotonic()
+        while self._running:
+            timeout = None
+            if self.stats_interval:
+                timeout = max(0.0, last_report + self.stats_interval - time.monotonic())
+            for key, _ in self.selector.select(timeout):
+                if key.data is None:
+                    self._drain_wakeup()
+                else:
+                    self._forward(key.data)
+            now = time.monotonic()
+            if self.stats_interval and now - last_report >= self.stats_interval:
+                self.report(now - last_report)
+                last_report = now
+
+    def _drain_wakeup(self):
+        """Empties the wake-up socket."""
+        try:
+            while self._wakeup_receiver.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def stop(self):
+        """Stops the relay loop. Can be called from another thread."""
+        self._running = False
+        self._wakeup_sender.send(b"\0")
+
+    def close(self):
+        """Closes the sockets of the relay."""
+        self.selector.close()
+        for relay_port in self.ports:
+            relay_port.socket.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Relays F1 telemetry datagrams from several ports to several destinations.")
+    parser.add_argument("--ports", type=int, nargs="+", default=DEFAULT_PORTS,
+                        help=f"The ports to listen on. Default is {' '.join(map(str, DEFAULT_PORTS))}.")
+    parser.add_argument("--destination", type=parse_destination, action="append", required=True,
+                        help="A destination as address:port. Can be repeated.")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL,
+                        help="Seconds between statistics reports, 0 to disable them.")
+    args = parser.parse_args()
+
+    relay = UDPRelay(args.ports, args.destination, args.stats_interval or None)
+    print(f"Relaying ports {args.ports} to {', '.join(f'{address}:{port}' for address, port in args.destination)}")
+    try:
+        relay.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(relay.statistics())
+        relay.close()
 
-udp_sockets = [create_socket(port_number) for port_number in [20773,20775,20776,20777]]
 
-while True:
-    for udp_socket in udp_sockets:
-        get(udp_socket)
+if __name__ == "__main__":
+    main()